@@ -23,6 +23,9 @@ export class ApiService {
     // Always append user_input (even if empty, backend expects it)
     formData.append('user_input', userInput || '');
 
+    // Results are shown as-is in the chat, so ask for indented JSON
+    formData.append('pretty', 'true');
+
     if (file) {
       formData.append('file', file);
     }
@@ -7,9 +7,13 @@ Usage:
     python server/cleanup.py          # Show stats and cleanup
     python server/cleanup.py --dry    # Show stats only, don't delete
 """
+import asyncio
+import io
+import itertools
 import sys
 import os
 from pathlib import Path
+from typing import List, Optional
 
 # Add server directory to path so imports work from any location
 server_dir = Path(__file__).parent
@@ -19,6 +23,7 @@ sys.path.insert(0, str(server_dir))
 from dotenv import load_dotenv
 load_dotenv(server_dir / ".env")
 
+import httpx
 from google import genai
 
 # Get API key directly from env
@@ -29,17 +34,64 @@ if not GEMINI_API_KEY:
     print(f"   Make sure it's set in: {server_dir / '.env'}")
     sys.exit(1)
 
+# Gemini has no batch delete - deletes are multiplexed as HTTP/2 streams
+# over a single connection instead, so only one TLS handshake is paid
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+DELETE_MAX_STREAMS = 64
+DELETE_TIMEOUT = 30
+
+# Stats table rows are written to stdout in chunks of this size
+STATS_FLUSH_ROWS = 1000
+
+KB = 1024
+MB = KB * 1024
+GB = MB * 1024
+
 
 def format_bytes(size_bytes: int) -> str:
     """Convert bytes to human readable format"""
-    if size_bytes < 1024:
+    if size_bytes < KB:
         return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.2f} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes / (1024 * 1024):.2f} MB"
+    elif size_bytes < MB:
+        return f"{size_bytes / KB:.2f} KB"
+    elif size_bytes < GB:
+        return f"{size_bytes / MB:.2f} MB"
     else:
-        return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
+        return f"{size_bytes / GB:.2f} GB"
+
+
+async def _delete_one(http: httpx.AsyncClient, streams: asyncio.Semaphore, file_name: str) -> Optional[str]:
+    """Delete a single file, returning the error message on failure"""
+    async with streams:
+        try:
+            response = await http.delete(f"/{file_name}")
+        except httpx.HTTPError as e:
+            return str(e)
+    
+    if response.is_error:
+        return f"HTTP {response.status_code}: {response.text[:200]}"
+    return None
+
+
+async def delete_files(file_names: List[str]) -> List[Optional[str]]:
+    """
+    Delete files over one multiplexed HTTP/2 connection
+
+    Args:
+        file_names: Gemini file names ("files/...")
+
+    Returns:
+        Error message (or None on success) for each file, in input order
+    """
+    streams = asyncio.Semaphore(DELETE_MAX_STREAMS)
+    async with httpx.AsyncClient(
+        base_url=GEMINI_API_BASE,
+        headers={"x-goog-api-key": GEMINI_API_KEY},
+        http2=True,
+        limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+        timeout=DELETE_TIMEOUT,
+    ) as http:
+        return await asyncio.gather(*(_delete_one(http, streams, name) for name in file_names))
 
 
 def cleanup_gemini_storage(dry_run: bool = False):
@@ -59,18 +111,20 @@ def cleanup_gemini_storage(dry_run: bool = False):
     # Fetch all files
     print("\n📂 Fetching files from Gemini storage...")
     
+    # Stream the (paginated) listing once, keeping only names for deletion
     try:
-        files_list = list(client.files.list())
+        files_iter = iter(client.files.list())
+        first_file = next(files_iter, None)
     except Exception as e:
         print(f"❌ Failed to fetch files: {e}")
         return
     
-    if not files_list:
+    if first_file is None:
         print("✅ No files found in storage. Nothing to clean up!")
         return
     
     # Calculate stats
-    total_files = len(files_list)
+    file_names = []
     total_bytes = 0
     
     print(f"\n📊 STORAGE STATS:")
@@ -78,22 +132,38 @@ def cleanup_gemini_storage(dry_run: bool = False):
     print(f"{'File Name':<35} {'Size':<12} {'State':<10} {'Created':<20} {'Expires'}")
     print("-" * 100)
     
-    for file in files_list:
-        file_size = getattr(file, 'size_bytes', 0) or 0
-        total_bytes += file_size
-        state = getattr(file, 'state', 'unknown')
-        
-        # Get timestamps
-        create_time = getattr(file, 'create_time', None)
-        expiration_time = getattr(file, 'expiration_time', None)
-        
-        # Format timestamps
-        created_str = create_time.strftime("%Y-%m-%d %H:%M") if create_time else "N/A"
-        expires_str = expiration_time.strftime("%Y-%m-%d %H:%M") if expiration_time else "N/A"
-        
-        # Truncate long names
-        display_name = file.name[:32] + "..." if len(file.name) > 35 else file.name
-        print(f"{display_name:<35} {format_bytes(file_size):<12} {state:<10} {created_str:<20} {expires_str}")
+    buffer = io.StringIO()
+    
+    try:
+        for row_count, file in enumerate(itertools.chain((first_file,), files_iter), 1):
+            name = file.name
+            file_names.append(name)
+            file_size = file.size_bytes or 0
+            total_bytes += file_size
+            
+            # Format timestamps
+            create_time = file.create_time
+            expiration_time = file.expiration_time
+            created_str = create_time.strftime("%Y-%m-%d %H:%M") if create_time else "N/A"
+            expires_str = expiration_time.strftime("%Y-%m-%d %H:%M") if expiration_time else "N/A"
+            
+            # Truncate long names
+            display_name = name if len(name) <= 35 else name[:32] + "..."
+            buffer.write(
+                f"{display_name:<35} {format_bytes(file_size):<12} {file.state or 'unknown':<10} "
+                f"{created_str:<20} {expires_str}\n"
+            )
+            
+            if row_count % STATS_FLUSH_ROWS == 0:
+                sys.stdout.write(buffer.getvalue())
+                buffer = io.StringIO()
+    except Exception as e:
+        sys.stdout.write(buffer.getvalue())
+        print(f"❌ Failed to fetch files: {e}")
+        return
+    
+    sys.stdout.write(buffer.getvalue())
+    total_files = len(file_names)
     
     print("-" * 100)
     print(f"{'TOTAL':<35} {format_bytes(total_bytes):<12} {total_files} files")
@@ -127,13 +197,14 @@ def cleanup_gemini_storage(dry_run: bool = False):
     deleted = 0
     failed = 0
     
-    for file in files_list:
-        try:
-            client.files.delete(name=file.name)
-            print(f"   ✓ Deleted: {file.name}")
+    errors = asyncio.run(delete_files(file_names))
+    
+    for file_name, error in zip(file_names, errors):
+        if error is None:
+            print(f"   ✓ Deleted: {file_name}")
             deleted += 1
-        except Exception as e:
-            print(f"   ✗ Failed: {file.name} - {e}")
+        else:
+            print(f"   ✗ Failed: {file_name} - {error}")
             failed += 1
     
     # Summary
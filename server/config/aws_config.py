@@ -2,9 +2,7 @@
 AWS Secrets Manager configuration
 """
 import json
-import boto3
-from botocore.exceptions import ClientError
-from aws_secretsmanager_caching import SecretCache, SecretCacheConfig
+from dataclasses import dataclass
 from .settings import settings
 
 
@@ -17,6 +15,10 @@ class AWSSecretsManager:
     def _get_cache(cls):
         """Get or create secret cache"""
         if cls._cache is None:
+            # Imported lazily - only needed on the AWS path, and slow to import
+            import boto3
+            from aws_secretsmanager_caching import SecretCache, SecretCacheConfig
+            
             session = boto3.session.Session()
             client = session.client(
                 service_name="secretsmanager",
@@ -40,6 +42,8 @@ class AWSSecretsManager:
         Raises:
             ClientError: If secret retrieval fails
         """
+        from botocore.exceptions import ClientError
+        
         if secret_name is None:
             secret_name = settings.aws_secret_name
         
@@ -51,34 +55,31 @@ class AWSSecretsManager:
             raise e
 
 
+@dataclass(frozen=True)
+class DatabaseCreds:
+    """Database connection details from the secret"""
+    host: str
+    port: int
+    user: str
+    password: str
+    db: str
+
+
 class DatabaseConfig:
     """Database configuration from AWS Secrets Manager"""
     
-    _secret = None
-    
-    @classmethod
-    def _get_secret(cls) -> dict:
-        """Get cached secret"""
-        if cls._secret is None:
-            cls._secret = AWSSecretsManager.get_secret()
-        return cls._secret
-    
-    @classmethod
-    def get_host(cls) -> str:
-        return cls._get_secret()["RDS_HOST"]
-    
-    @classmethod
-    def get_port(cls) -> int:
-        return cls._get_secret()["RDS_PORT"]
-    
-    @classmethod
-    def get_username(cls) -> str:
-        return cls._get_secret()["RDS_USERNAME"]
+    _creds = None
     
     @classmethod
-    def get_password(cls) -> str:
-        return cls._get_secret()["RDS_PASSWORD"]
-    
-    @classmethod
-    def get_database(cls) -> str:
-        return cls._get_secret()["RDS_DB_NAME_CHATBOX"]
+    def load(cls) -> DatabaseCreds:
+        """Fetch the secret once and return cached credentials"""
+        if cls._creds is None:
+            secret = AWSSecretsManager.get_secret()
+            cls._creds = DatabaseCreds(
+                host=secret["RDS_HOST"],
+                port=secret["RDS_PORT"],
+                user=secret["RDS_USERNAME"],
+                password=secret["RDS_PASSWORD"],
+                db=secret["RDS_DB_NAME_CHATBOX"],
+            )
+        return cls._creds
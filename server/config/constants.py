@@ -6,7 +6,25 @@ Application constants and configuration values
 GEMINI_MODEL = "gemini-2.5-pro"
 GEMINI_FILE_POLL_INTERVAL = 3  # seconds
 GEMINI_FILE_MAX_WAIT_TIME = 60  # seconds
+GEMINI_FILE_REUSE_TTL = 60 * 60  # reuse uploaded files for identical bytes for 1 hour
 GEMINI_REQUEST_TIMEOUT = 180  # 3 minutes timeout for Gemini API calls
+GEMINI_FILE_POLL_INITIAL = 0.1  # seconds between upload state checks, grows 1.7x per check
+GEMINI_FILE_POLL_MAX = 2.0  # seconds
+GEMINI_FILE_LIST_PAGE_SIZE = 100  # max files per files.list page
+GEMINI_DELETE_CONCURRENCY = 16  # parallel deletes in cleanup_all_files
+GEMINI_MAX_CONNECTIONS = 100  # shared HTTP pool across all Gemini calls
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# Extraction Cache Configuration
+EXTRACTION_CACHE_DIR = "data/llm_cache"  # relative to server directory
+EXTRACTION_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days
+EXTRACTION_RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled for each further retry
+BOND_REUSE_MIN_SIMILARITY = 0.9  # Jaccard similarity to an earlier bill's items before cached bond items are reused
+
+# Price Cache Configuration (Redis, only used when REDIS_URL is set)
+PRICE_CACHE_TTL = 24 * 60 * 60  # found prices
+PRICE_CACHE_NEGATIVE_TTL = 60 * 60  # "not found" answers from Gemini
+PRICE_CACHE_SOCKET_TIMEOUT = 0.5  # seconds - a slow cache must not stall lookups
 
 # File Upload Configuration
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB max file size
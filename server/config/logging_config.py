@@ -0,0 +1,52 @@
+"""
+Logging configuration
+Records are queued by the calling thread and written to stdout by a
+background listener, so request handlers never block on the stream lock
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+
+class LoggingConfig:
+    """Owns the root queue handler and its listener thread"""
+
+    _handler: Optional[QueueHandler] = None
+    _listener: Optional[QueueListener] = None
+
+    @classmethod
+    def start(cls, level: str = "INFO") -> None:
+        """
+        Route root logger records through a queue to a stdout handler
+
+        Args:
+            level: Root log level name (e.g. 'DEBUG', 'INFO')
+        """
+        if cls._listener is not None:
+            return
+
+        log_queue = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        cls._handler = QueueHandler(log_queue)
+        root = logging.getLogger()
+        root.addHandler(cls._handler)
+        root.setLevel(level.upper())
+
+        cls._listener = QueueListener(log_queue, stream_handler)
+        cls._listener.start()
+
+    @classmethod
+    def stop(cls) -> None:
+        """Flush queued records and detach the queue handler"""
+        if cls._listener is None:
+            return
+
+        cls._listener.stop()
+        logging.getLogger().removeHandler(cls._handler)
+        cls._listener = None
+        cls._handler = None
@@ -1,6 +1,7 @@
 """
 Simple application settings
 """
+import os
 from pydantic_settings import BaseSettings
 from typing import List
 
@@ -13,10 +14,13 @@ class Settings(BaseSettings):
     
     # Gemini AI
     gemini_api_key: str
+    legacy_json_parsing: bool = False  # Strip fences step by step before parsing (old path)
+    gemini_pool_size: int = min(32, (os.cpu_count() or 1) * 4)  # Threads shared by all Gemini chat calls
     
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
+    log_level: str = "INFO"  # DEBUG shows per-request progress from the chat routes
     
     # CORS (use "*" to allow all origins, or comma-separated list)
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
@@ -28,9 +32,19 @@ class Settings(BaseSettings):
     local_db_password: str = "piyupiyu"
     local_db_name: str = "mydb"
     
+    # MySQL driver (SQLAlchemy dialect name): pymysql or mysqlconnector
+    db_driver: str = "pymysql"
+    # Ping each pooled connection on checkout (an extra round trip per session);
+    # only needed if MySQL can drop idle connections sooner than pool_recycle
+    db_pool_pre_ping: bool = False
+    
     # AWS (for production)
     aws_region: str = "ap-south-1"
     aws_secret_name: str = "DB_SECRET"
+    s3_bucket: str = ""  # Bucket for uploaded files; empty = store in DB (LONGBLOB)
+    
+    # Redis (price lookup cache) - empty = no caching, e.g. redis://localhost:6379/0
+    redis_url: str = ""
     
     @property
     def cors_origins_list(self) -> List[str]:
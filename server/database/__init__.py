@@ -2,7 +2,8 @@
 Database module
 """
 from database.connection import Database, get_db
-from database.models import Base, ChatSession, InternalDatabase, AbhaDatabase, SessionStatus, DocumentChoice
+from database.models import Base, ChatSession, InternalDatabase, AbhaDatabase
+from models.enums import SessionStatus, DocumentChoice
 from database.setup import create_tables, drop_tables, reset_tables
 
 __all__ = [
@@ -1,6 +1,7 @@
 """
 SQLAlchemy database connection and session management
 """
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
@@ -8,6 +9,31 @@ from typing import Generator
 from config.settings import settings
 
 
+def _json_dumps(value) -> str:
+    """Serialize JSON columns with orjson (returns bytes, SQLAlchemy expects str)"""
+    return orjson.dumps(value).decode()
+
+
+# LIFO checkout keeps recently used connections warm instead of rotating
+# every one through MySQL's idle timeout.
+# The pool is sized so every Gemini worker thread can hold a session at once,
+# and recycling hourly (well under MySQL's default 8h wait_timeout) lets us skip
+# the per-checkout ping. The larger compiled-statement cache holds every query
+# shape the services issue, so none of them is recompiled after warm-up.
+# JSON columns are read with orjson rather than pydantic_core.from_json (jiter):
+# orjson also caches repeated object keys and parses session payloads faster.
+ENGINE_OPTIONS = {
+    "pool_size": 20,
+    "max_overflow": 40,
+    "pool_use_lifo": True,
+    "pool_recycle": 3600,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+    "query_cache_size": 1200,
+    "json_serializer": _json_dumps,
+    "json_deserializer": orjson.loads,
+}
+
+
 class Database:
     """SQLAlchemy database manager"""
 
@@ -17,16 +43,18 @@ class Database:
     @classmethod
     def get_database_url(cls) -> str:
         """
-        Build database URL based on environment
+        Build database URL based on environment (MySQL driver from settings.db_driver)
         
         - local/development/dev → Use local MySQL
         - production/staging/any other → Use AWS Secrets Manager
         """
+        driver = settings.db_driver
+
         # Simple check: if environment is local/dev, use local DB, else use AWS
         if settings.is_local:
             print(f"🏠 LOCAL database: {settings.local_db_host}/{settings.local_db_name}")
             return (
-                f"mysql+mysqlconnector://"
+                f"mysql+{driver}://"
                 f"{settings.local_db_user}:{settings.local_db_password}"
                 f"@{settings.local_db_host}:{settings.local_db_port}"
                 f"/{settings.local_db_name}"
@@ -36,11 +64,12 @@ class Database:
         print(f"☁️ AWS database (region: {settings.aws_region})")
         from config.aws_config import DatabaseConfig
         
+        creds = DatabaseConfig.load()
         return (
-            f"mysql+mysqlconnector://"
-            f"{DatabaseConfig.get_username()}:{DatabaseConfig.get_password()}"
-            f"@{DatabaseConfig.get_host()}:{DatabaseConfig.get_port()}"
-            f"/{DatabaseConfig.get_database()}"
+            f"mysql+{driver}://"
+            f"{creds.user}:{creds.password}"
+            f"@{creds.host}:{creds.port}"
+            f"/{creds.db}"
         )
 
     @classmethod
@@ -48,12 +77,7 @@ class Database:
         """Get or create SQLAlchemy engine"""
         if cls._engine is None:
             url = cls.get_database_url()
-            cls._engine = create_engine(
-                url,
-                pool_size=5,
-                pool_recycle=3600,
-                pool_pre_ping=True,
-            )
+            cls._engine = create_engine(url, **ENGINE_OPTIONS)
             print(f"✅ SQLAlchemy engine created")
         return cls._engine
 
@@ -5,6 +5,9 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     Column,
+    CHAR,
+    Computed,
+    Index,
     String,
     Text,
     LargeBinary,
@@ -13,57 +16,55 @@ from sqlalchemy import (
     DECIMAL,
     Integer,
     JSON,
+    UniqueConstraint,
     create_engine,
+    func,
 )
-from sqlalchemy.dialects.mysql import LONGBLOB
-from sqlalchemy.orm import declarative_base, sessionmaker
-import enum
+from sqlalchemy.dialects.mysql import LONGBLOB, insert as mysql_insert
+from sqlalchemy.orm import declarative_base, sessionmaker, deferred, Session
+from models.enums import SessionStatus, DocumentChoice
 
 Base = declarative_base()
 
 
-# Enums
-class SessionStatus(str, enum.Enum):
-    AWAITING_POLICY = "awaiting_policy"
-    AWAITING_DOCUMENT_CHOICE = "awaiting_document_choice"
-    AWAITING_BILL = "awaiting_bill"
-    AWAITING_PRESCRIPTION = "awaiting_prescription"
-    AWAITING_BOTH_BILL = "awaiting_both_bill"
-    AWAITING_BOTH_PRESCRIPTION = "awaiting_both_prescription"
-    COMPLETED = "completed"
-
-
-class DocumentChoice(str, enum.Enum):
-    BILL = "bill"
-    PRESCRIPTION = "prescription"
-    BOTH = "both"
-
-
 # Models
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # Serves status filters alone and status + recency ordering
+        Index("ix_sessions_status_updated", "status", "updated_at"),
+    )
 
-    id = Column(String(36), primary_key=True)
+    id = Column(CHAR(36), primary_key=True)  # UUID hex (older rows: hyphenated)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    # File storage (LONGBLOB for large files, S3 path later)
-    policy_bond_file = Column(LONGBLOB, nullable=True)
+    # File storage: S3 key when S3 is configured, else LONGBLOB fallback.
+    # Blobs are deferred so loading a session doesn't pull up to 30MB of files.
+    policy_bond_file = deferred(Column(LONGBLOB, nullable=True))
+    policy_bond_s3_key = Column(String(512), nullable=True)
     policy_bond_filename = Column(String(255), nullable=True)
-    bill_file = Column(LONGBLOB, nullable=True)
+    bill_file = deferred(Column(LONGBLOB, nullable=True))
+    bill_s3_key = Column(String(512), nullable=True)
     bill_filename = Column(String(255), nullable=True)
-    prescription_file = Column(LONGBLOB, nullable=True)
+    prescription_file = deferred(Column(LONGBLOB, nullable=True))
+    prescription_s3_key = Column(String(512), nullable=True)
     prescription_filename = Column(String(255), nullable=True)
 
     # Extracted data (JSON for debugging)
-    bill_extraction = Column(JSON, nullable=True)
-    bond_extraction = Column(JSON, nullable=True)
-    prescription_extraction = Column(JSON, nullable=True)
-    calculation_result = Column(JSON, nullable=True)
+    bill_extraction = Column(JSON(none_as_null=True), nullable=True)
+    bond_extraction = Column(JSON(none_as_null=True), nullable=True)
+    prescription_extraction = Column(JSON(none_as_null=True), nullable=True)
+    calculation_result = Column(JSON(none_as_null=True), nullable=True)
 
     # Session state
+    # Stored as the plain string value (VARCHAR), so filters bind raw strings
     status = Column(
-        Enum(SessionStatus),
+        Enum(
+            SessionStatus,
+            values_callable=lambda statuses: [status.value for status in statuses],
+            native_enum=False,
+        ),
         default=SessionStatus.AWAITING_POLICY,
         nullable=False,
     )
@@ -72,14 +73,47 @@ class ChatSession(Base):
 
 class InternalDatabase(Base):
     __tablename__ = "internal_database"
+    __table_args__ = (
+        UniqueConstraint("procedure_name", "hospital_name", name="uq_proc_hospital"),
+        # Price lookups match on the normalized names (procedure alone or with hospital)
+        Index("ix_internal_norm_names", "procedure_name_norm", "hospital_name_norm"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     procedure_name = Column(String(255), nullable=False, index=True)
-    hospital_name = Column(String(255), nullable=True, index=True)
+    # '' means "no hospital": NULLs are distinct in a MySQL unique key, so
+    # hospital-less rows would never hit uq_proc_hospital and never upsert
+    hospital_name = Column(String(255), nullable=False, server_default="", index=True)
     price = Column(DECIMAL(15, 2), nullable=True)
     source = Column(String(50), default="Manual", index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Generated by the DB so lookups can compare against an index
+    # instead of LOWER(TRIM(...)) on every row
+    procedure_name_norm = Column(String(255), Computed("LOWER(TRIM(procedure_name))", persisted=True))
+    hospital_name_norm = Column(String(255), Computed("LOWER(TRIM(hospital_name))", persisted=True))
+
+    @classmethod
+    def bulk_upsert(cls, session: Session, rows: list[dict]) -> None:
+        """
+        Insert price rows in one multi-row INSERT, updating price/source
+        for (procedure_name, hospital_name) pairs that already exist
+
+        Args:
+            session: Open DB session (committed by the caller)
+            rows: Dicts with procedure_name, hospital_name (None for none), price, source
+        """
+        if not rows:
+            return
+
+        rows = [{**row, "hospital_name": row.get("hospital_name") or ""} for row in rows]
+        stmt = mysql_insert(cls).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            price=stmt.inserted.price,
+            source=stmt.inserted.source,
+        )
+        session.execute(stmt)
+
 
 class AbhaDatabase(Base):
     """Reference to existing ABHA database table"""
@@ -89,3 +123,10 @@ class AbhaDatabase(Base):
     package_name = Column(String(255), nullable=True)
     total_package_price = Column(DECIMAL(15, 2), nullable=True)
     # Add other columns as needed
+
+    # External table we don't migrate, so lookups match on the expression
+    # itself; this functional index (MySQL 8.0.13+) is optional and only
+    # makes that match indexed
+    __table_args__ = (
+        Index("ix_abha_package_name_norm", func.lower(func.trim(package_name))),
+    )
@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
-from routes import chat_router
+from routes import chat_router, health_router
 from config.settings import settings
+from config.logging_config import LoggingConfig
+from services.gemini_service import GeminiService
 from database.setup import create_tables
 
 
@@ -10,6 +13,7 @@ from database.setup import create_tables
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup: Create tables if they don't exist
+    LoggingConfig.start(settings.log_level)
     print("🚀 Starting up...")
     try:
         create_tables()
@@ -18,6 +22,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("👋 Shutting down...")
+    GeminiService.close_shared()
+    LoggingConfig.stop()
 
 
 # Initialize FastAPI app
@@ -37,8 +43,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large replies (final chat turns embed the full result JSON)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Register routes
 app.include_router(chat_router)
+app.include_router(health_router)
 
 
 @app.get("/")
@@ -0,0 +1,20 @@
+"""
+Enums shared by the API schemas and the ORM models
+"""
+from enum import Enum
+
+
+class SessionStatus(str, Enum):
+    AWAITING_POLICY = "awaiting_policy"
+    AWAITING_DOCUMENT_CHOICE = "awaiting_document_choice"
+    AWAITING_BILL = "awaiting_bill"
+    AWAITING_PRESCRIPTION = "awaiting_prescription"
+    AWAITING_BOTH_BILL = "awaiting_both_bill"
+    AWAITING_BOTH_PRESCRIPTION = "awaiting_both_prescription"
+    COMPLETED = "completed"
+
+
+class DocumentChoice(str, Enum):
+    BILL = "bill"
+    PRESCRIPTION = "prescription"
+    BOTH = "both"
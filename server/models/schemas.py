@@ -1,35 +1,33 @@
 """
 Pydantic models for the claim assistance system
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Dict, Any
-from enum import Enum
+from models.enums import SessionStatus, DocumentChoice  # shared with the ORM so statuses compare by identity
 
-
-class SessionStatus(str, Enum):
-    AWAITING_POLICY = "awaiting_policy"
-    AWAITING_DOCUMENT_CHOICE = "awaiting_document_choice"
-    AWAITING_BILL = "awaiting_bill"
-    AWAITING_PRESCRIPTION = "awaiting_prescription"
-    AWAITING_BOTH_BILL = "awaiting_both_bill"
-    AWAITING_BOTH_PRESCRIPTION = "awaiting_both_prescription"
-    COMPLETED = "completed"
-
-
-class DocumentChoice(str, Enum):
-    BILL = "bill"
-    PRESCRIPTION = "prescription"
-    BOTH = "both"
+# Chat models are built by our own routes, so unknown fields are a bug.
+# Extraction/calculation models validate Gemini-shaped dicts that carry
+# extra keys (page numbers, coverage status...), so those are ignored.
+_RESPONSE_CONFIG = ConfigDict(extra="forbid", frozen=True)
+_DATA_CONFIG = ConfigDict(extra="ignore", frozen=True)
 
 
 class ChatOption(BaseModel):
     """Option for user to select"""
+    model_config = _RESPONSE_CONFIG
+
     value: str
     label: str
 
 
 class ChatResponse(BaseModel):
-    """Chat response with session tracking"""
+    """
+    Chat response with session tracking
+    Built only by the chat routes from trusted values, so they use
+    model_construct() and skip validation
+    """
+    model_config = _RESPONSE_CONFIG
+
     reply: str
     session_id: str
     status: SessionStatus
@@ -41,6 +39,8 @@ class ChatResponse(BaseModel):
 
 class BillLineItem(BaseModel):
     """Single line item from hospital bill"""
+    model_config = _DATA_CONFIG
+
     item_name: str
     amount: float
     per_day_rate: Optional[float] = None  # For room rent, ICU
@@ -50,6 +50,8 @@ class BillLineItem(BaseModel):
 
 class BillExtraction(BaseModel):
     """Extracted data from hospital bill"""
+    model_config = _DATA_CONFIG
+
     total_amount: float
     line_items: List[BillLineItem]
     discount: Optional[float] = 0.0
@@ -59,6 +61,8 @@ class BillExtraction(BaseModel):
 
 class BonusStructure(BaseModel):
     """NCB or Loyalty bonus structure"""
+    model_config = _DATA_CONFIG
+
     bonus_type: str  # "ncb" or "loyalty"
     current_percentage: Optional[float] = None  # Current applicable %
     yearly_increase: Optional[List[float]] = None  # [20, 40, 60, 80, 100] progression
@@ -68,6 +72,8 @@ class BonusStructure(BaseModel):
 
 class PolicyLimit(BaseModel):
     """Single coverage limit from policy bond"""
+    model_config = _DATA_CONFIG
+
     coverage_name: str  # e.g., "Room Rent", "ICU Charges"
     limit_value: float  # The raw number
     limit_type: str  # "absolute", "percentage", "per_day"
@@ -76,6 +82,8 @@ class PolicyLimit(BaseModel):
 
 class BondExtraction(BaseModel):
     """Extracted data from policy bond"""
+    model_config = _DATA_CONFIG
+
     sum_insured: float
     general_copay_percentage: Optional[float] = 0.0
     ncb_bonus: Optional[BonusStructure] = None
@@ -87,6 +95,8 @@ class BondExtraction(BaseModel):
 
 class MatchedItem(BaseModel):
     """Bill item matched with policy limit"""
+    model_config = _DATA_CONFIG
+
     bill_item: str
     bill_amount: float
     matched_coverage: Optional[str] = None
@@ -101,6 +111,8 @@ class MatchedItem(BaseModel):
 
 class CalculationResult(BaseModel):
     """Final claim calculation result"""
+    model_config = _DATA_CONFIG
+
     # Sum insured details
     base_sum_insured: float
     effective_sum_insured: float  # After NCB + Loyalty bonus
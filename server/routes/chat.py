@@ -1,9 +1,11 @@
 """
 Chat routes - Handles the claim assessment flow
 """
-import json
+import asyncio
+import logging
+import orjson
 from fastapi import APIRouter, HTTPException, Form, UploadFile, File
-from typing import Optional
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
 from services.gemini_service import GeminiService
 from services.storage_service import StorageService
@@ -15,17 +17,74 @@ from models.schemas import ChatResponse, ChatOption, SessionStatus
 from config.constants import MAX_FILE_SIZE
 
 router = APIRouter(prefix="/api", tags=["chat"])
-
-# Initialize services
-gemini_service = GeminiService()
-extraction_service = ExtractionService()
+logger = logging.getLogger(__name__)
+
+# Reply options are identical for every session (ChatOption is frozen, so sharing is safe)
+DOCUMENT_CHOICE_OPTIONS = [
+    ChatOption(value="bill", label="🧾 Hospital Bill (Claim Calculation)"),
+    ChatOption(value="prescription", label="💊 Prescription (Price Lookup)"),
+    ChatOption(value="both", label="📋 Both Documents"),
+]
+DOCUMENT_CHOICE_RETRY_OPTIONS = [
+    ChatOption(value="bill", label="🧾 Hospital Bill"),
+    ChatOption(value="prescription", label="💊 Prescription"),
+    ChatOption(value="both", label="📋 Both"),
+]
+RESET_OPTIONS = [
+    ChatOption(value="reset", label="🔄 Start New Assessment"),
+]
+
+# Document choice -> (next status, upload prompt)
+DOCUMENT_CHOICES: Dict[str, Tuple[SessionStatus, str]] = {
+    "bill": (SessionStatus.AWAITING_BILL, "Please upload your hospital bill for claim calculation."),
+    "prescription": (SessionStatus.AWAITING_PRESCRIPTION, "Please upload your prescription for price lookup."),
+    "both": (SessionStatus.AWAITING_BOTH_BILL, "Please upload your hospital bill first (for claim calculation)."),
+}
+
+FILE_TOO_LARGE_DETAIL = f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.0f}MB."
+
+# Supported upload types (PDF or image)
+ALLOWED_EXTENSIONS = frozenset({"pdf", "png", "jpg", "jpeg", "gif", "webp", "avif"})
+
+# Initialize services (one shared Gemini client/connection pool)
+gemini_service = GeminiService.shared()
+extraction_service = ExtractionService(gemini_service)
 calculation_service = CalculationService()
-price_lookup_service = PriceLookupService()
+price_lookup_service = PriceLookupService(gemini_service)
+
+
+def _dumps(value, pretty: bool = False) -> str:
+    """Serialize a result dict for the chat reply (indented only when asked for)"""
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+    return orjson.dumps(value, option=option).decode()
+
+
+async def _read_capped(file: UploadFile) -> bytes:
+    """
+    Read an upload, rejecting it without buffering when it exceeds MAX_FILE_SIZE
+
+    The upload is already spooled by the multipart parser, so it is read
+    with a single bounded read() into one buffer (no chunk copies).
+
+    Args:
+        file: Uploaded file
+
+    Returns:
+        File bytes
+    """
+    if file.size is None or file.size <= MAX_FILE_SIZE:
+        file_data = await file.read(MAX_FILE_SIZE + 1)
+        if len(file_data) <= MAX_FILE_SIZE:
+            return file_data
+
+    await file.close()
+    raise HTTPException(status_code=400, detail=FILE_TOO_LARGE_DETAIL)
 
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     user_input: str = Form(default=""),
+    pretty: bool = Form(default=False),
     session_id: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
 ):
@@ -40,181 +99,173 @@ async def chat(
     5. awaiting_both_bill: Upload bill (when both selected)
     6. awaiting_both_prescription: Upload prescription (when both selected)
     7. completed: Show results
+
+    Result JSON in replies is compact unless `pretty` is set
     """
     try:
-        # Get or create session
-        if session_id:
-            session = SessionService.get_session(session_id)
-            if not session:
-                session_id = SessionService.create_session()
-                session = SessionService.get_session(session_id)
-        else:
-            session_id = SessionService.create_session()
-            session = SessionService.get_session(session_id)
-
-        status = session["status"]
+        # Get or create session (one worker-thread hop for the DB round trips)
+        session_id, session = await asyncio.to_thread(_get_or_create_session, session_id)
+
+        status: SessionStatus = session["status"]
 
         # Route to appropriate handler
-        handlers = {
-            "awaiting_policy": _handle_awaiting_policy,
-            "awaiting_document_choice": _handle_document_choice,
-            "awaiting_bill": _handle_awaiting_bill,
-            "awaiting_prescription": _handle_awaiting_prescription,
-            "awaiting_both_bill": _handle_awaiting_both_bill,
-            "awaiting_both_prescription": _handle_awaiting_both_prescription,
-            "completed": _handle_completed,
-        }
-
-        handler = handlers.get(status)
+        handler = _STATUS_HANDLERS.get(status)
         if not handler:
             raise HTTPException(status_code=500, detail=f"Unknown session status: {status}")
 
-        return await handler(session_id, session, file, user_input)
+        return await handler(session_id, session, file, user_input, pretty)
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Chat error: {e}")
+        logger.error("Chat error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/claim_calc", response_model=ChatResponse)
+async def claim_calc(
+    bond: UploadFile = File(...),
+    bill: UploadFile = File(...),
+    pretty: bool = Form(default=False),
+):
+    """
+    One-shot claim calculation - policy bond and bill in a single request
+
+    Runs the same steps as the bill-only chat flow (policy upload, "bill"
+    choice, bill upload) without the two intermediate round trips. The
+    session is still recorded and ends up completed.
+    """
+    try:
+        # Reject bad or oversized uploads before any session or file is written
+        for upload in (bond, bill):
+            if not upload.filename or not _is_valid_file(upload.filename):
+                raise HTTPException(status_code=400, detail="Invalid file type. Please upload PDF or image.")
+        bond_data = await _read_capped(bond)
+        bill_data = await _read_capped(bill)
+
+        session_id = await asyncio.to_thread(_create_bill_session)
+
+        # The bond is stored alongside the bill processing, which uses it from memory
+        result, _ = await asyncio.gather(
+            _process_bill_and_calculate(
+                session_id, (bill_data, bill.filename), pretty=pretty, policy_file=(bond_data, bond.filename)
+            ),
+            asyncio.to_thread(StorageService.store_file, session_id, "policy_bond", bond_data, bond.filename),
+        )
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Claim calculation error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 async def _handle_awaiting_policy(
-    session_id: str, session: dict, file: Optional[UploadFile], user_input: str
+    session_id: str, session: dict, file: Optional[UploadFile], user_input: str, pretty: bool = False
 ) -> ChatResponse:
     """Step 1: Upload policy bond"""
     if not file or not file.filename:
-        return ChatResponse(
+        return ChatResponse.model_construct(
             reply="Welcome! Please upload your insurance policy bond document to begin.",
             session_id=session_id,
             status=SessionStatus.AWAITING_POLICY,
             input_type="file",
         )
 
-    file_data = await file.read()
+    file_data = await _read_capped(file)
     filename = file.filename
 
-    # Validate file size
-    if len(file_data) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.0f}MB."
-        )
-
     if not _is_valid_file(filename):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload PDF or image.")
 
-    StorageService.store_file(session_id, "policy_bond", file_data, filename)
-    SessionService.update_status(session_id, "awaiting_document_choice")
+    # DB/S3 write runs in a worker thread so concurrent uploads don't block the event loop
+    await asyncio.to_thread(StorageService.store_file, session_id, "policy_bond", file_data, filename)
+    await asyncio.to_thread(SessionService.update_status, session_id, SessionStatus.AWAITING_DOCUMENT_CHOICE)
 
-    return ChatResponse(
+    return ChatResponse.model_construct(
         reply=f"Policy bond '{filename}' received. What would you like to process?",
         session_id=session_id,
         status=SessionStatus.AWAITING_DOCUMENT_CHOICE,
         input_type="options",
-        options=[
-            ChatOption(value="bill", label="🧾 Hospital Bill (Claim Calculation)"),
-            ChatOption(value="prescription", label="💊 Prescription (Price Lookup)"),
-            ChatOption(value="both", label="📋 Both Documents"),
-        ],
+        options=DOCUMENT_CHOICE_OPTIONS,
     )
 
 
 async def _handle_document_choice(
-    session_id: str, session: dict, file: Optional[UploadFile], user_input: str
+    session_id: str, session: dict, file: Optional[UploadFile], user_input: str, pretty: bool = False
 ) -> ChatResponse:
     """Step 2: Choose document type"""
     choice = user_input.strip().lower()
 
-    if choice == "bill":
-        SessionService.set_document_choice(session_id, "bill")
-        SessionService.update_status(session_id, "awaiting_bill")
-        return ChatResponse(
-            reply="Please upload your hospital bill for claim calculation.",
-            session_id=session_id,
-            status=SessionStatus.AWAITING_BILL,
-            input_type="file",
-        )
-
-    elif choice == "prescription":
-        SessionService.set_document_choice(session_id, "prescription")
-        SessionService.update_status(session_id, "awaiting_prescription")
-        return ChatResponse(
-            reply="Please upload your prescription for price lookup.",
-            session_id=session_id,
-            status=SessionStatus.AWAITING_PRESCRIPTION,
-            input_type="file",
-        )
-
-    elif choice == "both":
-        SessionService.set_document_choice(session_id, "both")
-        SessionService.update_status(session_id, "awaiting_both_bill")
-        return ChatResponse(
-            reply="Please upload your hospital bill first (for claim calculation).",
-            session_id=session_id,
-            status=SessionStatus.AWAITING_BOTH_BILL,
-            input_type="file",
-        )
-
-    else:
-        return ChatResponse(
+    entry = DOCUMENT_CHOICES.get(choice)
+    if entry is None:
+        return ChatResponse.model_construct(
             reply="Please select an option:",
             session_id=session_id,
             status=SessionStatus.AWAITING_DOCUMENT_CHOICE,
             input_type="options",
-            options=[
-                ChatOption(value="bill", label="🧾 Hospital Bill"),
-                ChatOption(value="prescription", label="💊 Prescription"),
-                ChatOption(value="both", label="📋 Both"),
-            ],
+            options=DOCUMENT_CHOICE_RETRY_OPTIONS,
         )
 
+    next_status, reply = entry
+    await asyncio.gather(
+        asyncio.to_thread(SessionService.set_document_choice, session_id, choice),
+        asyncio.to_thread(SessionService.update_status, session_id, next_status),
+    )
+    return ChatResponse.model_construct(
+        reply=reply,
+        session_id=session_id,
+        status=next_status,
+        input_type="file",
+    )
+
 
 async def _handle_awaiting_bill(
-    session_id: str, session: dict, file: Optional[UploadFile], user_input: str
+    session_id: str, session: dict, file: Optional[UploadFile], user_input: str, pretty: bool = False
 ) -> ChatResponse:
     """Process bill only - full claim calculation"""
     if not file or not file.filename:
-        return ChatResponse(
+        return ChatResponse.model_construct(
             reply="Please upload the hospital bill document.",
             session_id=session_id,
             status=SessionStatus.AWAITING_BILL,
         )
 
-    return await _process_bill_and_calculate(session_id, file)
+    return await _process_bill_and_calculate(session_id, await _read_bill(file), pretty=pretty)
 
 
 async def _handle_awaiting_prescription(
-    session_id: str, session: dict, file: Optional[UploadFile], user_input: str
+    session_id: str, session: dict, file: Optional[UploadFile], user_input: str, pretty: bool = False
 ) -> ChatResponse:
     """Process prescription only - price lookup"""
     if not file or not file.filename:
-        return ChatResponse(
+        return ChatResponse.model_construct(
             reply="Please upload the prescription document.",
             session_id=session_id,
             status=SessionStatus.AWAITING_PRESCRIPTION,
         )
 
-    return await _process_prescription(session_id, file, is_final=True)
+    return await _process_prescription(session_id, file, is_final=True, pretty=pretty)
 
 
 async def _handle_awaiting_both_bill(
-    session_id: str, session: dict, file: Optional[UploadFile], user_input: str
+    session_id: str, session: dict, file: Optional[UploadFile], user_input: str, pretty: bool = False
 ) -> ChatResponse:
     """Process bill when both selected"""
     if not file or not file.filename:
-        return ChatResponse(
+        return ChatResponse.model_construct(
             reply="Please upload the hospital bill document.",
             session_id=session_id,
             status=SessionStatus.AWAITING_BOTH_BILL,
         )
 
-    # Process bill and calculate
-    result = await _process_bill_and_calculate(session_id, file, is_final=False)
-
-    # Update status to await prescription
-    SessionService.update_status(session_id, "awaiting_both_prescription")
+    # Process bill and calculate, then await prescription
+    result = await _process_bill_and_calculate(
+        session_id, await _read_bill(file), next_status=SessionStatus.AWAITING_BOTH_PRESCRIPTION, pretty=pretty
+    )
 
-    return ChatResponse(
+    return ChatResponse.model_construct(
         reply=result.reply + "\n\n---\nNow please upload your prescription for price lookup.",
         session_id=session_id,
         status=SessionStatus.AWAITING_BOTH_PRESCRIPTION,
@@ -222,162 +273,213 @@ async def _handle_awaiting_both_bill(
 
 
 async def _handle_awaiting_both_prescription(
-    session_id: str, session: dict, file: Optional[UploadFile], user_input: str
+    session_id: str, session: dict, file: Optional[UploadFile], user_input: str, pretty: bool = False
 ) -> ChatResponse:
     """Process prescription when both selected (final step)"""
     if not file or not file.filename:
-        return ChatResponse(
+        return ChatResponse.model_construct(
             reply="Please upload the prescription document.",
             session_id=session_id,
             status=SessionStatus.AWAITING_BOTH_PRESCRIPTION,
         )
 
-    return await _process_prescription(session_id, file, is_final=True)
+    return await _process_prescription(session_id, file, is_final=True, pretty=pretty)
 
 
 async def _handle_completed(
-    session_id: str, session: dict, file: Optional[UploadFile], user_input: str
+    session_id: str, session: dict, file: Optional[UploadFile], user_input: str, pretty: bool = False
 ) -> ChatResponse:
     """Assessment completed"""
     if user_input.strip().lower() in ["reset", "new", "start over"]:
-        new_session_id = SessionService.create_session()
-        return ChatResponse(
+        new_session_id = await asyncio.to_thread(SessionService.create_session)
+        return ChatResponse.model_construct(
             reply="Starting new assessment. Please upload your insurance policy bond.",
             session_id=new_session_id,
             status=SessionStatus.AWAITING_POLICY,
             input_type="file",
         )
 
-    calculation_result = SessionService.get_extraction(session_id, "calculation_result")
-    result_json = json.dumps(calculation_result, indent=2) if calculation_result else "No results found."
+    calculation_result = await asyncio.to_thread(SessionService.get_extraction, session_id, "calculation_result")
+    result_json = _dumps(calculation_result, pretty) if calculation_result else "No results found."
 
-    return ChatResponse(
+    return ChatResponse.model_construct(
         reply=f"Assessment complete.\n\n{result_json}",
         session_id=session_id,
         status=SessionStatus.COMPLETED,
         input_type="options",
-        options=[
-            ChatOption(value="reset", label="🔄 Start New Assessment"),
-        ],
+        options=RESET_OPTIONS,
     )
 
 
-# --- Helper Functions ---
+# Status -> handler dispatch table
+_STATUS_HANDLERS: Dict[SessionStatus, Callable[..., Awaitable[ChatResponse]]] = {
+    SessionStatus.AWAITING_POLICY: _handle_awaiting_policy,
+    SessionStatus.AWAITING_DOCUMENT_CHOICE: _handle_document_choice,
+    SessionStatus.AWAITING_BILL: _handle_awaiting_bill,
+    SessionStatus.AWAITING_PRESCRIPTION: _handle_awaiting_prescription,
+    SessionStatus.AWAITING_BOTH_BILL: _handle_awaiting_both_bill,
+    SessionStatus.AWAITING_BOTH_PRESCRIPTION: _handle_awaiting_both_prescription,
+    SessionStatus.COMPLETED: _handle_completed,
+}
 
 
-async def _process_bill_and_calculate(
-    session_id: str, file: UploadFile, is_final: bool = True
-) -> ChatResponse:
-    """Process bill file and run claim calculation"""
-    file_data = await file.read()
-    filename = file.filename
+# --- Helper Functions ---
 
-    # Validate file size
-    if len(file_data) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.0f}MB."
-        )
 
-    if not _is_valid_file(filename):
+async def _read_bill(file: UploadFile) -> Tuple[bytes, str]:
+    """Read an uploaded bill as (data, filename), rejecting unsupported types"""
+    file_data = await _read_capped(file)
+    if not _is_valid_file(file.filename):
         raise HTTPException(status_code=400, detail="Invalid file type.")
+    return file_data, file.filename
 
-    StorageService.store_file(session_id, "bill", file_data, filename)
 
-    # Extract bill
-    print(f"[{session_id}] Extracting bill...")
-    bill_extraction = extraction_service.extract_bill(file_data, filename)
-    SessionService.save_extraction(session_id, "bill_extraction", bill_extraction)
+async def _process_bill_and_calculate(
+    session_id: str,
+    bill_file: Tuple[bytes, str],
+    next_status: SessionStatus = SessionStatus.COMPLETED,
+    pretty: bool = False,
+    policy_file: Optional[Tuple[bytes, str]] = None,
+) -> ChatResponse:
+    """
+    Process bill file and run claim calculation, moving the session to next_status
+
+    bill_file is the already read and validated (data, filename) of the bill.
+    policy_file is the (data, filename) of the policy bond when the caller
+    already has it in memory; otherwise it is fetched from storage
+    """
+    file_data, filename = bill_file
+
+    # Extract bill while storing it and fetching the policy bond
+    # (bond extraction needs the bill keywords, so it runs after)
+    logger.debug("[%s] Extracting bill...", session_id)
+    steps = [
+        asyncio.to_thread(StorageService.store_file, session_id, "bill", file_data, filename),
+        extraction_service.aextract_bill(file_data, filename),
+    ]
+    if policy_file is None:
+        steps.append(asyncio.to_thread(StorageService.get_file, session_id, "policy_bond"))
+    _, bill_extraction, *fetched = await asyncio.gather(*steps)
+    if fetched:
+        policy_file = fetched[0]
+    # Persist the bill extraction while the bond is being extracted
+    save_bill = asyncio.create_task(asyncio.to_thread(
+        SessionService.save_extraction, session_id, "bill_extraction", bill_extraction
+    ))
 
     # Get keywords
     bill_keywords = [item["item_name"] for item in bill_extraction.get("line_items", [])]
-    print(f"[{session_id}] Keywords: {bill_keywords}")
+    logger.debug("[%s] Keywords: %s", session_id, bill_keywords)
 
-    # Get policy bond
-    policy_file = StorageService.get_file(session_id, "policy_bond")
     if not policy_file:
+        await save_bill
         raise HTTPException(status_code=500, detail="Policy bond not found")
 
     policy_data, policy_filename = policy_file
 
     # Extract bond limits
-    print(f"[{session_id}] Extracting bond limits...")
-    bond_extraction = extraction_service.extract_bond_for_keywords(
-        policy_data, policy_filename, bill_keywords
+    logger.debug("[%s] Extracting bond limits...", session_id)
+    bond_extraction, _ = await asyncio.gather(
+        extraction_service.aextract_bond_for_keywords(policy_data, policy_filename, bill_keywords),
+        save_bill,
     )
-    SessionService.save_extraction(session_id, "bond_extraction", bond_extraction)
 
-    # Calculate
-    print(f"[{session_id}] Calculating claim...")
-    calculation_result = calculation_service.calculate_claim(bill_extraction, bond_extraction)
-    SessionService.save_extraction(session_id, "calculation_result", calculation_result)
+    # Calculate while saving the bond extraction
+    logger.debug("[%s] Calculating claim...", session_id)
+    calculation_result, _ = await asyncio.gather(
+        asyncio.to_thread(calculation_service.calculate_claim, bill_extraction, bond_extraction),
+        asyncio.to_thread(SessionService.save_extraction, session_id, "bond_extraction", bond_extraction),
+    )
 
-    if is_final:
-        SessionService.update_status(session_id, "completed")
+    # Save the result and advance the session together (only once the calculation succeeded)
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(asyncio.to_thread(
+            SessionService.save_extraction, session_id, "calculation_result", calculation_result
+        ))
+        tg.create_task(asyncio.to_thread(SessionService.update_status, session_id, next_status))
 
-    result_json = json.dumps(calculation_result, indent=2)
+    result_json = _dumps(calculation_result, pretty)
 
-    return ChatResponse(
+    return ChatResponse.model_construct(
         reply=f"Claim Calculation Result:\n\n{result_json}",
         session_id=session_id,
-        status=SessionStatus.COMPLETED if is_final else SessionStatus.AWAITING_BOTH_PRESCRIPTION,
+        status=next_status,
     )
 
 
-async def _process_prescription(session_id: str, file: UploadFile, is_final: bool = True) -> ChatResponse:
+async def _process_prescription(
+    session_id: str, file: UploadFile, is_final: bool = True, pretty: bool = False
+) -> ChatResponse:
     """Process prescription file and do price lookup"""
-    file_data = await file.read()
+    file_data = await _read_capped(file)
     filename = file.filename
 
-    # Validate file size
-    if len(file_data) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.0f}MB."
-        )
-
     if not _is_valid_file(filename):
         raise HTTPException(status_code=400, detail="Invalid file type.")
 
-    StorageService.store_file(session_id, "prescription", file_data, filename)
-
-    # Extract prescription
-    print(f"[{session_id}] Extracting prescription...")
-    prescription_extraction = extraction_service.extract_prescription(file_data, filename)
-    SessionService.save_extraction(session_id, "prescription_extraction", prescription_extraction)
+    # Extract prescription while storing it
+    logger.debug("[%s] Extracting prescription...", session_id)
+    _, prescription_extraction = await asyncio.gather(
+        asyncio.to_thread(StorageService.store_file, session_id, "prescription", file_data, filename),
+        extraction_service.aextract_prescription(file_data, filename),
+    )
 
     procedure_name = prescription_extraction.get("procedure_name")
     hospital_name = prescription_extraction.get("hospital_name")
 
-    # Price lookup
-    print(f"[{session_id}] Looking up price for: {procedure_name}")
-    price_result = price_lookup_service.lookup_price(procedure_name, hospital_name)
-
-    # Save to internal DB if found via Gemini (for future lookups)
-    if price_result.get("source") == "Gemini" and price_result.get("price"):
-        price_lookup_service.save_to_internal_db(
-            procedure_name=procedure_name,
-            price=price_result["price"],
-            source="Gemini",
-            hospital_name=hospital_name,
-        )
+    # Price lookup while saving the prescription extraction
+    logger.debug("[%s] Looking up price for: %s", session_id, procedure_name)
+    price_result, _ = await asyncio.gather(
+        asyncio.to_thread(price_lookup_service.lookup_price, procedure_name, hospital_name),
+        asyncio.to_thread(
+            SessionService.save_extraction, session_id, "prescription_extraction", prescription_extraction
+        ),
+    )
+
+    async with asyncio.TaskGroup() as tg:
+        # Save to internal DB if found via Gemini (for future lookups)
+        if price_result.get("source") == "Gemini" and price_result.get("price"):
+            tg.create_task(asyncio.to_thread(
+                price_lookup_service.save_to_internal_db,
+                procedure_name=procedure_name,
+                price=price_result["price"],
+                source="Gemini",
+                hospital_name=hospital_name,
+            ))
 
-    if is_final:
-        SessionService.update_status(session_id, "completed")
+        if is_final:
+            tg.create_task(asyncio.to_thread(SessionService.update_status, session_id, SessionStatus.COMPLETED))
 
     result = {
         "prescription_data": prescription_extraction,
         "price_lookup": price_result,
     }
-    result_json = json.dumps(result, indent=2)
+    result_json = _dumps(result, pretty)
 
-    return ChatResponse(
+    return ChatResponse.model_construct(
         reply=f"Prescription Analysis & Price Lookup:\n\n{result_json}",
         session_id=session_id,
         status=SessionStatus.COMPLETED,
     )
 
 
+def _get_or_create_session(session_id: Optional[str]) -> Tuple[str, dict]:
+    """Load the session, starting a fresh one if it is missing or unknown"""
+    session = SessionService.get_session(session_id) if session_id else None
+    if not session:
+        session_id = SessionService.create_session()
+        session = SessionService.get_session(session_id)
+    return session_id, session
+
+
+def _create_bill_session() -> str:
+    """Start a session that has already chosen the bill-only flow"""
+    session_id = SessionService.create_session()
+    SessionService.set_document_choice(session_id, "bill")
+    return session_id
+
+
 def _is_valid_file(filename: str) -> bool:
     """Check if file type is supported"""
-    return filename.lower().endswith((".pdf", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif"))
+    _, dot, ext = filename.rpartition(".")
+    return bool(dot) and ext.lower() in ALLOWED_EXTENSIONS
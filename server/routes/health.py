@@ -1,25 +1,28 @@
 """
 Health check routes
 """
+import asyncio
 from fastapi import APIRouter
-from database import DatabaseConnection
+from database.connection import Database
 
 router = APIRouter(prefix="/api", tags=["health"])
 
 
-@router.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "GI Claim Assistance API"}
+def _ping_database() -> bool:
+    """
+    Check out a pooled connection and ping it with the driver's native ping
+    (a protocol-level COM_PING on MySQL - no SQL to parse or plan)
+    """
+    with Database.get_engine().connect() as conn:
+        return conn.dialect.do_ping(conn.connection.dbapi_connection)
 
 
 @router.get("/db-check")
 async def database_check():
     """Check database connectivity"""
     try:
-        with DatabaseConnection.get_cursor() as cursor:
-            cursor.execute("SELECT 1")
-            result = cursor.fetchone()
-            return {"status": "connected", "result": result}
+        if await asyncio.to_thread(_ping_database):
+            return {"status": "connected"}
+        return {"status": "error", "message": "Database ping failed"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
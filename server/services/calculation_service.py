@@ -1,7 +1,21 @@
 """
 Calculation service - Matches bill items to policy limits and calculates claim
 """
+import logging
 from typing import Dict, Any, List, Optional
+from utils.parsers import parse_currency_to_float
+
+logger = logging.getLogger(__name__)
+
+
+def _num(value: Any) -> float:
+    """
+    Extracted amount as a number - missing is 0, and strings Gemini
+    sometimes returns (e.g. "1,200" or "₹1200") are parsed, not dropped
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value or 0
+    return parse_currency_to_float(value)
 
 
 class CalculationService:
@@ -26,18 +40,33 @@ class CalculationService:
         Returns:
             Dict with effective_sum_insured, ncb_applied, loyalty_applied
         """
+        apply_ncb = is_ncb_applied and ncb_bonus and ncb_bonus.get('current_percentage')
+        apply_loyalty = loyalty_bonus and loyalty_bonus.get('current_percentage')
+        
+        # Most policies carry no bonus - nothing to compute
+        if not (apply_ncb or apply_loyalty):
+            return {
+                "base_sum_insured": base_sum_insured,
+                "is_ncb_applied": is_ncb_applied,
+                "ncb_percentage": 0.0,
+                "ncb_bonus_applied": 0.0,
+                "loyalty_percentage": 0.0,
+                "loyalty_bonus_applied": 0.0,
+                "effective_sum_insured": round(float(base_sum_insured), 2)
+            }
+        
         ncb_applied = 0.0
         ncb_percentage = 0.0
         loyalty_applied = 0.0
         loyalty_percentage = 0.0
         
         # Apply NCB bonus - only if flag is True
-        if is_ncb_applied and ncb_bonus and ncb_bonus.get('current_percentage'):
+        if apply_ncb:
             ncb_percentage = ncb_bonus['current_percentage']
             ncb_applied = base_sum_insured * (ncb_percentage / 100)
         
         # Apply Loyalty bonus - calculate amount from percentage
-        if loyalty_bonus and loyalty_bonus.get('current_percentage'):
+        if apply_loyalty:
             loyalty_percentage = loyalty_bonus['current_percentage']
             loyalty_applied = base_sum_insured * (loyalty_percentage / 100)
         
@@ -117,33 +146,35 @@ class CalculationService:
         effective_sum_insured = sum_insured_result['effective_sum_insured']
         
         # Step 2: Get general copay
-        general_copay_pct = bond_extraction.get('general_copay_percentage', 0) or 0
+        general_copay_pct = _num(bond_extraction.get('general_copay_percentage'))
         
         # Step 3: Build lookup for coverage limits
-        coverage_lookup = {}
-        for limit in bond_extraction.get('coverage_limits', []):
-            bill_item = limit.get('bill_item', '').lower().strip()
-            if bill_item:
-                coverage_lookup[bill_item] = limit
+        # (later entries win on duplicate keys, same as repeated assignment)
+        coverage_lookup = {
+            bill_item: limit
+            for limit in bond_extraction.get('coverage_limits', [])
+            if (bill_item := limit.get('bill_item', '').lower().strip())
+        }
         
         # Step 4: Build lookup for exclusions
-        exclusion_lookup = {}
-        for exclusion in bond_extraction.get('exclusions', []):
-            bill_item = exclusion.get('bill_item', '').lower().strip()
-            if bill_item:
-                exclusion_lookup[bill_item] = exclusion
+        exclusion_lookup = {
+            bill_item: exclusion
+            for exclusion in bond_extraction.get('exclusions', [])
+            if (bill_item := exclusion.get('bill_item', '').lower().strip())
+        }
         
         # Step 5: Process each bill item
         matched_items = []
         total_eligible = 0.0
         total_excess = 0.0
         total_copay = 0.0
+        sum_of_items = 0
         
         bill_items = bill_extraction.get('line_items', [])
         
         for item in bill_items:
             item_name = item.get('item_name', '')
-            bill_amount = item.get('amount', 0) or 0
+            bill_amount = _num(item.get('amount'))
             days = item.get('days')
             item_copay_pct = item.get('item_specific_copay')
             
@@ -231,10 +262,11 @@ class CalculationService:
             total_eligible += eligible_amount
             total_excess += excess_amount
             total_copay += copay_amount
+            sum_of_items += bill_amount
         
         # Step 6: Calculate totals
-        total_bill = bill_extraction.get('total_amount', 0) or 0
-        discount = bill_extraction.get('discount', 0) or 0
+        total_bill = _num(bill_extraction.get('total_amount'))
+        discount = _num(bill_extraction.get('discount'))
         net_bill = total_bill - discount
         
         total_insurer_pays = total_eligible - total_copay
@@ -247,7 +279,7 @@ class CalculationService:
             total_patient_pays += excess_over_si
         
         # Validation: Check if extracted items match total bill
-        sum_of_items = sum(item.get('amount', 0) for item in bill_items)
+        # (sum_of_items is accumulated in the item loop above)
         
         # Calculate discrepancy percentage
         discrepancy = sum_of_items - net_bill
@@ -276,14 +308,14 @@ class CalculationService:
             scale_factor = net_bill / sum_of_items
             total_insurer_pays = total_insurer_pays * scale_factor
             total_patient_pays = net_bill - total_insurer_pays
-            print(f"WARNING: Over-extraction detected. Scaling down by {scale_factor:.3f}")
+            logger.warning("Over-extraction detected. Scaling down by %.3f", scale_factor)
         else:
             # Under-extraction (missing items)
             extraction_status = "under_extracted"
             missing_amount = abs(discrepancy)
             warning_message = f"Incomplete extraction: {len(bill_items)} items totaling Rs.{sum_of_items:.2f}, but bill total is Rs.{net_bill:.2f}. Missing Rs.{missing_amount:.2f} ({discrepancy_pct:.1f}%)"
             total_patient_pays += missing_amount
-            print(f"WARNING: Under-extraction detected. Missing Rs.{missing_amount:.2f}")
+            logger.warning("Under-extraction detected. Missing Rs.%.2f", missing_amount)
         
         return {
             # Sum insured details
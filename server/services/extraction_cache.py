@@ -0,0 +1,133 @@
+"""
+Extraction cache - Content-addressable disk cache for Gemini extraction results
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from config.constants import EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Max members remembered per group (oldest dropped first)
+MAX_GROUP_SIZE = 50
+
+# Serialises the read-modify-write in add_to_group across every cache instance
+_group_lock = threading.Lock()
+
+
+class ExtractionCache:
+    """
+    Stores parsed extraction results as data/llm_cache/{key}.json
+
+    Keys are derived from everything that influences the Gemini output
+    (model, prompt version, file bytes, keywords), so a hit can safely
+    skip the network round-trip.
+    """
+
+    def __init__(self, cache_dir: str = EXTRACTION_CACHE_DIR, ttl: int = EXTRACTION_CACHE_TTL):
+        self.cache_dir = Path(__file__).parent.parent / cache_dir
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(*parts: bytes) -> str:
+        """
+        Build a cache key from raw byte parts
+
+        Each part is prefixed with its 8-byte length so that file bytes
+        and keyword bytes can never shift into each other and collide.
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached extraction, or None on miss/expiry/corruption"""
+        path = self._path(key)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._evict(path)
+            return None
+
+        # Evict anything that doesn't look like an entry we wrote
+        if (
+            not isinstance(entry, dict)
+            or not isinstance(entry.get("value"), dict)
+            or not isinstance(entry.get("created_at"), (int, float))
+        ):
+            self._evict(path)
+            return None
+
+        if time.time() - entry["created_at"] > self.ttl:
+            self._evict(path)
+            return None
+
+        return entry["value"]
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store extraction result (best effort - failures are logged, not raised)"""
+        try:
+            self._write_atomic(self._path(key), json.dumps({"created_at": time.time(), "value": value}))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to write extraction cache %s: %s", key[:12], e)
+
+    def get_group(self, group_key: str) -> List[Dict[str, Any]]:
+        """
+        Return members recorded for a group (e.g. every keyword set extracted
+        from the same policy bond), newest last
+        """
+        try:
+            with open(self._group_path(group_key), "r", encoding="utf-8") as f:
+                members = json.loads(f.read())
+        except (OSError, ValueError):
+            return []
+        return members if isinstance(members, list) else []
+
+    def add_to_group(self, group_key: str, member: Dict[str, Any]) -> None:
+        """Record a member in a group (best effort)"""
+        try:
+            with _group_lock:
+                members = self.get_group(group_key)
+                members.append(member)
+                self._write_atomic(self._group_path(group_key), json.dumps(members[-MAX_GROUP_SIZE:]))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to write extraction cache group %s: %s", group_key[:12], e)
+
+    def _write_atomic(self, path: Path, payload: str) -> None:
+        """
+        Write payload to path via a uniquely named temp file, so concurrent
+        writers never share (or truncate) each other's temp file
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False)
+        try:
+            with f:
+                f.write(payload)
+            os.replace(f.name, path)
+        except BaseException:
+            self._evict(Path(f.name))
+            raise
+
+    def _group_path(self, group_key: str) -> Path:
+        return self.cache_dir / "groups" / f"{group_key}.json"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _evict(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -1,58 +1,28 @@
 """
 Extraction service - Uses Gemini to extract data from documents
 """
+import asyncio
 import json
-import re
-from typing import Dict, Any, List
+import logging
+import time
+import orjson
+from google.genai import errors as genai_errors
+from typing import Dict, Any, List, Optional, Set, Tuple
+from config.settings import settings
+from config.constants import EXTRACTION_RETRY_BACKOFF, BOND_REUSE_MIN_SIMILARITY
 from services.gemini_service import GeminiService
+from services.extraction_cache import ExtractionCache
 
+logger = logging.getLogger(__name__)
+
+# Prompt versions - bump when a prompt changes so stale cached extractions are ignored
+BILL_PROMPT_VERSION = "bill-v1"
+BOND_PROMPT_VERSION = "bond-v1"
+PRESCRIPTION_PROMPT_VERSION = "prescription-v1"
 
-class ExtractionService:
-    """Handles document extraction using Gemini AI"""
-    
-    def __init__(self):
-        self.gemini = GeminiService()
-    
-    def _clean_json_response(self, response: str) -> str:
-        """Remove markdown code blocks from response"""
-        # Remove ```json and ``` markers
-        cleaned = re.sub(r'^```json\s*', '', response.strip())
-        cleaned = re.sub(r'^```\s*', '', cleaned)
-        cleaned = re.sub(r'\s*```$', '', cleaned)
-        return cleaned.strip()
-    
-    def _parse_json_response(self, response: str) -> Dict[str, Any]:
-        """Parse JSON from Gemini response"""
-        cleaned = self._clean_json_response(response)
-        
-        # Check if response is plain text (not JSON)
-        if not cleaned.startswith('{') and not cleaned.startswith('['):
-            print(f"ERROR: Gemini returned plain text instead of JSON")
-            print(f"Response: {cleaned[:200]}")
-            raise ValueError(f"Gemini returned plain text instead of JSON. Response: {cleaned[:200]}")
-        
-        try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error: {e}")
-            print(f"Response was: {cleaned[:500]}")
-            raise ValueError(f"Failed to parse Gemini response as JSON: {e}")
-    
-    def extract_bill(self, file_data: bytes, filename: str, max_retries: int = 2) -> Dict[str, Any]:
-        """
-        Extract line items from hospital bill with retry logic
-        
-        Args:
-            file_data: Bill file bytes
-            filename: Bill filename
-            max_retries: Maximum number of retry attempts
-        
-        Returns dict with:
-        - total_amount: float
-        - discount: float
-        - line_items: list of {item_name, amount, per_day_rate?, days?}
-        """
-        prompt = """Extract charges from this hospital bill.
+
+# Prompts are built once at import; only the bond prompt has a variable part
+BILL_PROMPT = """Extract charges from this hospital bill.
 
 **CRITICAL: Many bills have TWO sections:**
 1. **SUMMARY** section (e.g., "Room & Nursing Charges: 2350", "Professional Fees: 1200")
@@ -87,124 +57,8 @@ Return JSON:
 5. Fix it before responding
 
 Return ONLY valid JSON. Do NOT return explanatory text."""
-        
-        # Retry logic
-        last_error = None
-        for attempt in range(max_retries + 1):
-            try:
-                if attempt > 0:
-                    print(f"Retry attempt {attempt}/{max_retries} for bill extraction...")
-                
-                response = self.gemini.chat_with_file(prompt, file_data, filename)
-                extracted_data = self._parse_json_response(response)
-                
-                # Deduplicate line items
-                extracted_data = self._deduplicate_bill_items(extracted_data)
-                
-                return extracted_data
-                
-            except ValueError as e:
-                last_error = e
-                error_msg = str(e)
-                
-                if "plain text instead of JSON" in error_msg:
-                    print(f"Attempt {attempt + 1} failed: Gemini returned plain text")
-                    if attempt < max_retries:
-                        # Add stronger instruction for retry
-                        prompt = prompt.replace(
-                            "Return ONLY valid JSON.",
-                            "Return ONLY valid JSON. NO explanations, NO apologies, ONLY JSON starting with { and ending with }."
-                        )
-                        continue
-                else:
-                    print(f"Attempt {attempt + 1} failed: {error_msg}")
-                    if attempt < max_retries:
-                        continue
-                
-                # If last attempt, raise the error
-                if attempt == max_retries:
-                    raise ValueError(f"Failed to extract bill after {max_retries + 1} attempts. Last error: {error_msg}")
-            
-            except Exception as e:
-                last_error = e
-                print(f"Attempt {attempt + 1} failed with unexpected error: {e}")
-                if attempt == max_retries:
-                    raise
-        
-        # Should never reach here, but just in case
-        raise last_error if last_error else Exception("Unknown error in bill extraction")
-    
-    def _deduplicate_bill_items(self, bill_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Remove duplicate bill items (same item_name appearing multiple times)
-        
-        Strategy: Keep the first occurrence of each unique item name
-        """
-        line_items = bill_data.get('line_items', [])
-        
-        if not line_items:
-            return bill_data
-        
-        seen_items = {}
-        deduplicated_items = []
-        duplicates_removed = []
-        
-        for item in line_items:
-            item_name = item.get('item_name', '').strip().upper()
-            
-            if not item_name:
-                continue
-            
-            if item_name not in seen_items:
-                # First occurrence - keep it
-                seen_items[item_name] = item
-                deduplicated_items.append(item)
-            else:
-                # Duplicate found - skip it
-                duplicates_removed.append({
-                    'item_name': item.get('item_name'),
-                    'amount': item.get('amount'),
-                    'reason': f"Duplicate of existing item"
-                })
-        
-        # Log duplicates if any were found
-        if duplicates_removed:
-            print(f"⚠️ Removed {len(duplicates_removed)} duplicate items:")
-            for dup in duplicates_removed[:5]:  # Show first 5
-                print(f"  - {dup['item_name']}: ₹{dup['amount']}")
-            if len(duplicates_removed) > 5:
-                print(f"  ... and {len(duplicates_removed) - 5} more")
-        
-        bill_data['line_items'] = deduplicated_items
-        bill_data['duplicates_removed'] = len(duplicates_removed)
-        
-        return bill_data
-    
-    def extract_bond_for_keywords(
-        self, 
-        file_data: bytes, 
-        filename: str, 
-        bill_keywords: List[str]
-    ) -> Dict[str, Any]:
-        """
-        Extract policy bond data for specific keywords from bill
-        
-        Args:
-            file_data: Policy bond file bytes
-            filename: Policy bond filename
-            bill_keywords: List of item names from the bill to match
-        
-        Returns dict with:
-        - sum_insured: float
-        - general_copay_percentage: float
-        - ncb_bonus: bonus structure
-        - loyalty_bonus: bonus structure  
-        - coverage_limits: list of matched limits with page numbers
-        - exclusions: list of explicitly excluded items with reasons and page numbers
-        """
-        keywords_str = ", ".join([f'"{k}"' for k in bill_keywords])
-        
-        prompt = f"""Analyze this insurance policy bond document.
+
+BOND_PROMPT_TEMPLATE = """Analyze this insurance policy bond document.
 
 I need to find coverage information for these items from a hospital bill: {keywords_str}
 
@@ -313,25 +167,8 @@ CRITICAL RULES:
 
 7. Return ONLY the JSON, no explanations.
 """
-        
-        response = self.gemini.chat_with_file(prompt, file_data, filename)
-        return self._parse_json_response(response)
 
-
-    def extract_prescription(self, file_data: bytes, filename: str) -> Dict[str, Any]:
-        """
-        Extract procedure and hospital information from prescription
-        
-        Returns dict with:
-        - procedure_name: str
-        - hospital_name: str (if available)
-        - doctor_name: str (if available)
-        - diagnosis: str (if available)
-        - additional_info: dict (any other relevant info)
-        
-        This format is compatible with internal_database for price storage
-        """
-        prompt = """Analyze this medical prescription/document and extract the procedure and hospital information.
+PRESCRIPTION_PROMPT = """Analyze this medical prescription/document and extract the procedure and hospital information.
 
 Return a JSON object with this EXACT structure:
 {
@@ -354,6 +191,400 @@ IMPORTANT RULES:
 4. All fields except procedure_name can be null if not found.
 5. Return ONLY the JSON, no explanations.
 """
+
+
+def _normalize_keyword(keyword: Optional[str]) -> str:
+    """Normalize bill item names the same way calculation matching does"""
+    return (keyword or "").lower().strip()
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two keyword sets (0 when both are empty)"""
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class ExtractionService:
+    """Handles document extraction using Gemini AI"""
+    
+    def __init__(self, gemini: Optional[GeminiService] = None):
+        self.gemini = gemini or GeminiService.shared()
+        self.cache = ExtractionCache()
+    
+    def _cache_key(
+        self, 
+        prompt_version: str, 
+        file_data: bytes, 
+        keywords: Optional[List[str]] = None
+    ) -> str:
+        """Build extraction cache key from provider, model, prompt version, file and keywords"""
+        return ExtractionCache.make_key(
+            b"gemini",
+            self.gemini.model.encode(),
+            prompt_version.encode(),
+            file_data,
+            json.dumps(sorted(keywords or [])).encode(),
+        )
+    
+    def _clean_json_response(self, response: str) -> str:
+        """Remove markdown code blocks from response"""
+        # Remove ```json and ``` markers (plain prefix/suffix checks, no regex)
+        cleaned = response.strip()
+        if cleaned.startswith("```json"):
+            cleaned = cleaned[7:]
+        elif cleaned.startswith("```"):
+            cleaned = cleaned[3:]
+        if cleaned.endswith("```"):
+            cleaned = cleaned[:-3]
+        return cleaned.strip()
+    
+    @staticmethod
+    def _json_bounds(response: str) -> Tuple[int, int]:
+        """
+        Locate the JSON payload inside a Gemini response
+
+        Same rules as _clean_json_response (surrounding whitespace and
+        markdown fences are dropped), but only indices are computed, so
+        the payload is copied once when sliced instead of once per step.
+        """
+        start, end = 0, len(response)
+        while start < end and response[start].isspace():
+            start += 1
+        while end > start and response[end - 1].isspace():
+            end -= 1
+
+        if response.startswith("```json", start, end):
+            start += 7
+        elif response.startswith("```", start, end):
+            start += 3
+        if response.endswith("```", start, end):
+            end -= 3
+
+        while start < end and response[start].isspace():
+            start += 1
+        while end > start and response[end - 1].isspace():
+            end -= 1
+        return start, end
+    
+    def _parse_json_response(self, response: str) -> Dict[str, Any]:
+        """Parse JSON from Gemini response"""
+        if settings.legacy_json_parsing:
+            cleaned = self._clean_json_response(response)
+        else:
+            start, end = self._json_bounds(response)
+            cleaned = response[start:end]
         
+        # Check if response is plain text (not JSON)
+        if cleaned[:1] not in ('{', '['):
+            logger.error("Gemini returned plain text instead of JSON. Response: %s", cleaned[:200])
+            raise ValueError(f"Gemini returned plain text instead of JSON. Response: {cleaned[:200]}")
+        
+        try:
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError as e:
+            logger.error("JSON parse error: %s. Response was: %s", e, cleaned[:500])
+            raise ValueError(f"Failed to parse Gemini response as JSON: {e}")
+    
+    def extract_bill(self, file_data: bytes, filename: str, max_retries: int = 2) -> Dict[str, Any]:
+        """
+        Extract line items from hospital bill with retry logic
+        
+        Args:
+            file_data: Bill file bytes
+            filename: Bill filename
+            max_retries: Maximum number of retry attempts
+        
+        Returns dict with:
+        - total_amount: float
+        - discount: float
+        - line_items: list of {item_name, amount, per_day_rate?, days?}
+        """
+        cache_key = self._cache_key(BILL_PROMPT_VERSION, file_data)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Bill extraction cache hit for %s", filename)
+            return cached
+        
+        prompt = BILL_PROMPT
+        
+        # Retry logic - only for failures that can differ on the next call,
+        # with exponential backoff between attempts
+        last_error = None
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                delay = EXTRACTION_RETRY_BACKOFF * 2 ** (attempt - 1)
+                logger.info("Retry attempt %d/%d for bill extraction in %.1fs...", attempt, max_retries, delay)
+                time.sleep(delay)
+            
+            try:
+                response = self.gemini.chat_with_file(prompt, file_data, filename)
+                extracted_data = self._parse_json_response(response)
+                
+                # Deduplicate line items
+                extracted_data = self._deduplicate_bill_items(extracted_data)
+                
+                self.cache.set(cache_key, extracted_data)
+                return extracted_data
+            
+            except Exception as e:
+                last_error = e
+                error_msg = str(e)
+                logger.warning("Attempt %d failed: %s", attempt + 1, error_msg)
+                
+                if not self._is_retryable(e):
+                    raise
+                
+                if "plain text instead of JSON" in error_msg:
+                    # Add stronger instruction for retry
+                    prompt = prompt.replace(
+                        "Return ONLY valid JSON.",
+                        "Return ONLY valid JSON. NO explanations, NO apologies, ONLY JSON starting with { and ending with }."
+                    )
+        
+        raise ValueError(f"Failed to extract bill after {max_retries + 1} attempts. Last error: {last_error}")
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """
+        Whether an extraction failure is worth another Gemini call
+        
+        Retries: unusable output (plain text / malformed JSON - sampling
+        differs per call), rate limits, server errors and timeouts.
+        Other API errors (bad request, rejected file, auth) would fail
+        the same way again.
+        """
+        if isinstance(error, ValueError):
+            return True
+        if isinstance(error, genai_errors.APIError):
+            return error.code == 429 or (error.code or 0) >= 500
+        return isinstance(error, TimeoutError) or "timed out" in str(error).lower()
+    
+    def _deduplicate_bill_items(self, bill_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Remove duplicate bill items (same item_name appearing multiple times)
+        
+        Strategy: Keep the first occurrence of each unique item name
+        """
+        line_items = bill_data.get('line_items', [])
+        
+        if not line_items:
+            return bill_data
+        
+        seen_names = set()
+        deduplicated_items = []
+        duplicate_samples = []  # first few duplicates, for the log only
+        duplicate_count = 0
+        
+        for item in line_items:
+            item_name = (item.get('item_name') or '').strip().upper()
+            
+            if not item_name:
+                continue
+            
+            if item_name in seen_names:
+                # Duplicate found - skip it
+                duplicate_count += 1
+                if len(duplicate_samples) < 5:
+                    duplicate_samples.append(item)
+                continue
+            
+            # First occurrence - keep it
+            seen_names.add(item_name)
+            deduplicated_items.append(item)
+        
+        # Log duplicates if any were found
+        if duplicate_count:
+            logger.warning("Removed %d duplicate items", duplicate_count)
+            for dup in duplicate_samples:
+                logger.info("  - %s: ₹%s", dup.get('item_name'), dup.get('amount'))
+            if duplicate_count > 5:
+                logger.info("  ... and %d more", duplicate_count - 5)
+        
+        bill_data['line_items'] = deduplicated_items
+        bill_data['duplicates_removed'] = duplicate_count
+        
+        return bill_data
+    
+    def _bond_prompt(self, bill_keywords: List[str]) -> str:
+        """Fill the bond prompt with the bill keywords"""
+        keywords_str = ", ".join(map('"{}"'.format, bill_keywords))
+        return BOND_PROMPT_TEMPLATE.format(keywords_str=keywords_str)
+    
+    def extract_bond_for_keywords(
+        self, 
+        file_data: bytes, 
+        filename: str, 
+        bill_keywords: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Extract policy bond data for specific keywords from bill
+        
+        Args:
+            file_data: Policy bond file bytes
+            filename: Policy bond filename
+            bill_keywords: List of item names from the bill to match
+        
+        Returns dict with:
+        - sum_insured: float
+        - general_copay_percentage: float
+        - ncb_bonus: bonus structure
+        - loyalty_bonus: bonus structure  
+        - coverage_limits: list of matched limits with page numbers
+        - exclusions: list of explicitly excluded items with reasons and page numbers
+        """
+        cache_key = self._cache_key(BOND_PROMPT_VERSION, file_data, bill_keywords)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Bond extraction cache hit for %s", filename)
+            return cached
+        
+        # Bills against the same bond mostly share items - when an earlier
+        # bill's items are similar enough, reuse every item already mapped
+        # for this bond and only ask Gemini about new ones
+        group_key = self._cache_key(BOND_PROMPT_VERSION, file_data)
+        wanted = {_normalize_keyword(k) for k in bill_keywords}
+        known = self._known_bond_items(group_key, wanted)
+        
+        if known is not None:
+            base_data, covered = known
+            missing_keywords = [k for k in bill_keywords if _normalize_keyword(k) not in covered]
+            logger.info(
+                "Bond extraction item cache hit for %s, querying %d new items", filename, len(missing_keywords)
+            )
+            
+            delta_data = None
+            if missing_keywords:
+                delta_data = self._query_bond(file_data, filename, missing_keywords)
+            extracted_data = self._merge_bond_extractions(base_data, bill_keywords, delta_data)
+        else:
+            extracted_data = self._query_bond(file_data, filename, bill_keywords)
+        
+        self.cache.set(cache_key, extracted_data)
+        self.cache.add_to_group(group_key, {"key": cache_key, "keywords": bill_keywords})
+        return extracted_data
+    
+    def _query_bond(self, file_data: bytes, filename: str, bill_keywords: List[str]) -> Dict[str, Any]:
+        """Ask Gemini for bond data covering the given keywords"""
+        prompt = self._bond_prompt(bill_keywords)
         response = self.gemini.chat_with_file(prompt, file_data, filename)
         return self._parse_json_response(response)
+    
+    def _known_bond_items(
+        self, group_key: str, wanted: Set[str]
+    ) -> Optional[Tuple[Dict[str, Any], Set[str]]]:
+        """
+        Combine every cached extraction of the same bond into one, keyed by item
+        
+        Members are read oldest first, so for an item asked about more than
+        once the newest answer wins - including an answer with no rows
+        (i.e. Gemini found the item not mentioned in the bond).
+        
+        Args:
+            group_key: Cache group of the bond
+            wanted: Normalized items of the current bill
+        
+        Returns:
+            Tuple of (combined extraction, normalized items it answers), or
+            None unless some earlier keyword set has a Jaccard similarity of
+            at least BOND_REUSE_MIN_SIMILARITY with wanted
+        """
+        combined = None
+        similar = False
+        rows_by_item = {"coverage_limits": {}, "exclusions": {}}
+        
+        for member in self.cache.get_group(group_key):
+            data = self.cache.get(member.get("key", ""))
+            if data is None:
+                continue
+            
+            keywords = {_normalize_keyword(k) for k in member.get("keywords") or []}
+            similar = similar or _jaccard(wanted, keywords) >= BOND_REUSE_MIN_SIMILARITY
+            combined = data
+            
+            for field, by_item in rows_by_item.items():
+                for keyword in keywords:
+                    by_item[keyword] = []
+                for row in data.get(field) or []:
+                    keyword = _normalize_keyword(row.get("bill_item"))
+                    if keyword in keywords:
+                        by_item[keyword].append(row)
+        
+        if combined is None or not similar:
+            return None
+        
+        # Bond-wide fields come from the newest extraction
+        combined = dict(combined)
+        for field, by_item in rows_by_item.items():
+            combined[field] = [row for rows in by_item.values() for row in rows]
+        
+        return combined, set(rows_by_item["coverage_limits"])
+    
+    def _merge_bond_extractions(
+        self, 
+        base_data: Dict[str, Any], 
+        bill_keywords: List[str], 
+        delta_data: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Combine a cached bond extraction with one for the missing keywords.
+        Bond-wide fields (sum insured, copay, bonuses) come from the cached
+        extraction; per-item rows from either are kept only for the current
+        bill's items.
+        """
+        wanted = {_normalize_keyword(k) for k in bill_keywords}
+        merged = dict(base_data)
+        
+        for field in ("coverage_limits", "exclusions"):
+            rows = list(base_data.get(field) or [])
+            if delta_data:
+                rows.extend(delta_data.get(field) or [])
+            merged[field] = [row for row in rows if _normalize_keyword(row.get("bill_item")) in wanted]
+        
+        return merged
+
+
+    def extract_prescription(self, file_data: bytes, filename: str) -> Dict[str, Any]:
+        """
+        Extract procedure and hospital information from prescription
+        
+        Returns dict with:
+        - procedure_name: str
+        - hospital_name: str (if available)
+        - doctor_name: str (if available)
+        - diagnosis: str (if available)
+        - additional_info: dict (any other relevant info)
+        
+        This format is compatible with internal_database for price storage
+        """
+        cache_key = self._cache_key(PRESCRIPTION_PROMPT_VERSION, file_data)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Prescription extraction cache hit for %s", filename)
+            return cached
+        
+        prompt = PRESCRIPTION_PROMPT
+        
+        response = self.gemini.chat_with_file(prompt, file_data, filename)
+        extracted_data = self._parse_json_response(response)
+        
+        self.cache.set(cache_key, extracted_data)
+        return extracted_data
+    
+    # --- Async wrappers (Gemini SDK is sync, so run in a worker thread) ---
+    
+    async def aextract_bill(self, file_data: bytes, filename: str, max_retries: int = 2) -> Dict[str, Any]:
+        """Async version of extract_bill"""
+        return await asyncio.to_thread(self.extract_bill, file_data, filename, max_retries)
+    
+    async def aextract_bond_for_keywords(
+        self, 
+        file_data: bytes, 
+        filename: str, 
+        bill_keywords: List[str]
+    ) -> Dict[str, Any]:
+        """Async version of extract_bond_for_keywords"""
+        return await asyncio.to_thread(self.extract_bond_for_keywords, file_data, filename, bill_keywords)
+    
+    async def aextract_prescription(self, file_data: bytes, filename: str) -> Dict[str, Any]:
+        """Async version of extract_prescription"""
+        return await asyncio.to_thread(self.extract_prescription, file_data, filename)
@@ -1,20 +1,74 @@
 """
 Gemini AI service for chat and document processing
 """
+import hashlib
 import io
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import httpx
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from google import genai
 from google.genai import types
 from config.settings import settings
-from config.constants import GEMINI_REQUEST_TIMEOUT
+from config.constants import (
+    GEMINI_REQUEST_TIMEOUT,
+    GEMINI_FILE_REUSE_TTL,
+    GEMINI_FILE_POLL_INITIAL,
+    GEMINI_FILE_POLL_MAX,
+    GEMINI_FILE_LIST_PAGE_SIZE,
+    GEMINI_DELETE_CONCURRENCY,
+    GEMINI_MAX_CONNECTIONS,
+    GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+)
+
+# Worker threads for chat() timeouts, shared by every GeminiService instance
+GEMINI_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.gemini_pool_size,
+    thread_name_prefix="gemini",
+)
+
+# Upload mime types by lowercase file extension
+MIME_TYPES = {
+    'pdf': 'application/pdf',
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+}
+
+class _CachedUpload:
+    """One shared Gemini upload of a file's bytes and the calls currently using it"""
+    
+    __slots__ = ("future", "expires_at", "in_use", "stale")
+    
+    def __init__(self):
+        self.future: Future = Future()  # resolves to the gemini file once uploaded
+        self.expires_at = float("inf")  # set when the upload completes
+        self.in_use = 0  # calls holding the handle
+        self.stale = False  # dropped from the cache; delete once in_use hits 0
 
 
 class GeminiService:
     """Service for interacting with Gemini AI"""
     
+    _shared: Optional["GeminiService"] = None
+    
     def __init__(self):
-        self.client = genai.Client(api_key=settings.gemini_api_key)
+        # One pooled HTTP/2 connection set per service - share the instance
+        # (see shared()) so every caller reuses the same keep-alive connections
+        self.client = genai.Client(
+            api_key=settings.gemini_api_key,
+            http_options=types.HttpOptions(client_args={
+                "http2": True,
+                "limits": httpx.Limits(
+                    max_connections=GEMINI_MAX_CONNECTIONS,
+                    max_keepalive_connections=GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            }),
+        )
         
         # Available Gemini Models (as of Nov 2025):
         # 
@@ -35,7 +89,26 @@ class GeminiService:
         # Uncomment for better quality (slower, more expensive):
         self.model = "gemini-3-pro-preview"
         
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # Uploaded file handles, keyed by sha256 of the file bytes, so the same
+        # document (e.g. extraction retries) isn't uploaded again. Concurrent
+        # calls for the same bytes wait on one upload (single-flight).
+        self._uploaded_files: Dict[bytes, _CachedUpload] = {}
+        self._uploaded_files_lock = threading.Lock()
+    
+    @classmethod
+    def shared(cls) -> "GeminiService":
+        """Get or create the process-wide service instance"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+    
+    @classmethod
+    def close_shared(cls):
+        """Delete the shared instance's cached uploads and release its HTTP connections"""
+        if cls._shared is not None:
+            cls._shared._delete_cached_uploads()
+            cls._shared.client.close()
+            cls._shared = None
     
     def chat(self, message: str) -> str:
         """
@@ -55,7 +128,7 @@ class GeminiService:
             return response.text.strip()
         
         try:
-            future = self.executor.submit(_make_request)
+            future = GEMINI_EXECUTOR.submit(_make_request)
             return future.result(timeout=GEMINI_REQUEST_TIMEOUT)
         except FuturesTimeoutError:
             print(f"Gemini timeout after {GEMINI_REQUEST_TIMEOUT} seconds")
@@ -67,7 +140,8 @@ class GeminiService:
     def chat_with_file(self, message: str, file_data: bytes, filename: str) -> str:
         """
         Send a message with a file to Gemini with timeout.
-        File is automatically deleted from Google storage after processing.
+        Uploads are reused for identical file bytes for GEMINI_FILE_REUSE_TTL
+        seconds, then deleted from Google storage.
         
         Args:
             message: Prompt/instruction
@@ -77,24 +151,11 @@ class GeminiService:
         Returns:
             Gemini's response text
         """
-        gemini_file_name = None
+        digest = hashlib.sha256(file_data).digest()
+        entry = None
         
         try:
-            # Determine mime type
-            mime_type = self._get_mime_type(filename)
-            
-            # Upload file to Gemini
-            file_io = io.BytesIO(file_data)
-            file_io.name = filename
-            
-            upload_config = types.UploadFileConfig(mime_type=mime_type)
-            gemini_file = self.client.files.upload(file=file_io, config=upload_config)
-            gemini_file_name = gemini_file.name  # Store for cleanup
-            
-            print(f"📤 Uploaded file to Gemini: {gemini_file_name}")
-            
-            # Poll until file is ready
-            self._wait_for_file_ready(gemini_file_name)
+            entry, gemini_file = self._acquire_upload(digest, file_data, filename)
             
             # Send message with file
             response = self.client.models.generate_content(
@@ -106,14 +167,133 @@ class GeminiService:
             
         except TimeoutError as e:
             print(f"Gemini file processing timeout: {e}")
+            if entry:
+                self._discard_upload(digest, entry)
             raise Exception(f"Gemini file processing timed out")
         except Exception as e:
             print(f"Gemini file chat error: {e}")
+            # Don't hand out a handle that may be broken - next call re-uploads
+            if entry:
+                self._discard_upload(digest, entry)
             raise
         finally:
-            # ALWAYS cleanup uploaded file to avoid storage charges
-            if gemini_file_name:
-                self._delete_file(gemini_file_name)
+            if entry:
+                self._release_upload(entry)
+    
+    def _acquire_upload(self, digest: bytes, file_data: bytes, filename: str) -> Tuple[_CachedUpload, types.File]:
+        """
+        Get the upload for these file bytes, uploading them if no call has yet.
+        The caller must pass the returned entry to _release_upload when done.
+        
+        Returns:
+            (cache entry, gemini file)
+        """
+        with self._uploaded_files_lock:
+            expired = self._pop_expired_locked()
+            entry = self._uploaded_files.get(digest)
+            is_owner = entry is None
+            if is_owner:
+                entry = _CachedUpload()
+                self._uploaded_files[digest] = entry
+            entry.in_use += 1
+        
+        for gemini_file in expired:
+            self._delete_file(gemini_file.name)
+        
+        if not is_owner:
+            try:
+                gemini_file = entry.future.result()
+            except BaseException:
+                with self._uploaded_files_lock:
+                    entry.in_use -= 1
+                raise
+            print(f"♻️ Reusing uploaded Gemini file: {gemini_file.name}")
+            return entry, gemini_file
+        
+        try:
+            gemini_file = self._upload_file(file_data, filename)
+        except BaseException as e:
+            # Waiting calls get the same error; the next call retries the upload
+            with self._uploaded_files_lock:
+                if self._uploaded_files.get(digest) is entry:
+                    del self._uploaded_files[digest]
+                entry.in_use -= 1
+            entry.future.set_exception(e)
+            raise
+        
+        expires_at = time.time() + GEMINI_FILE_REUSE_TTL
+        if gemini_file.expiration_time:
+            expires_at = min(expires_at, gemini_file.expiration_time.timestamp())
+        entry.expires_at = expires_at
+        entry.future.set_result(gemini_file)
+        return entry, gemini_file
+    
+    def _release_upload(self, entry: _CachedUpload):
+        """Finish using an upload, deleting it if it was dropped from the cache meanwhile"""
+        with self._uploaded_files_lock:
+            entry.in_use -= 1
+            delete = entry.stale and entry.in_use == 0
+        if delete:
+            self._delete_file(entry.future.result().name)
+    
+    def _discard_upload(self, digest: bytes, entry: _CachedUpload):
+        """Stop handing out an upload; it is deleted once the calls using it finish"""
+        with self._uploaded_files_lock:
+            if self._uploaded_files.get(digest) is entry:
+                del self._uploaded_files[digest]
+            entry.stale = True
+    
+    def _pop_expired_locked(self) -> List[types.File]:
+        """
+        Drop uploads whose reuse window has passed (call with the lock held)
+        
+        Returns:
+            Expired files no call is using - the caller deletes them. Ones
+            still in use are deleted by their last _release_upload.
+        """
+        now = time.time()
+        unused = []
+        for digest in [d for d, e in self._uploaded_files.items() if e.expires_at <= now]:
+            entry = self._uploaded_files.pop(digest)
+            entry.stale = True
+            if entry.in_use == 0:
+                unused.append(entry.future.result())
+        return unused
+    
+    def _delete_cached_uploads(self):
+        """Delete every cached upload from storage (uploads in use go when released)"""
+        with self._uploaded_files_lock:
+            entries = list(self._uploaded_files.values())
+            self._uploaded_files.clear()
+            unused = []
+            for entry in entries:
+                entry.stale = True
+                if entry.in_use == 0:
+                    unused.append(entry.future.result())
+        
+        for gemini_file in unused:
+            self._delete_file(gemini_file.name)
+    
+    def _upload_file(self, file_data: bytes, filename: str):
+        """Upload file to Gemini storage and wait until it is ready"""
+        mime_type = self._get_mime_type(filename)
+        
+        # The SDK only takes a path or a binary stream, not raw bytes
+        upload_config = types.UploadFileConfig(mime_type=mime_type, display_name=filename)
+        with io.BytesIO(file_data) as file_io:
+            gemini_file = self.client.files.upload(file=file_io, config=upload_config)
+        
+        print(f"📤 Uploaded file to Gemini: {gemini_file.name}")
+        
+        # Poll until file is ready - a file that never gets there is deleted
+        # here, since no caller ever receives its handle
+        try:
+            self._wait_for_file_ready(gemini_file.name)
+        except BaseException:
+            self._delete_file(gemini_file.name)
+            raise
+        
+        return gemini_file
     
     def _delete_file(self, file_name: str):
         """Delete file from Google storage to avoid charges"""
@@ -126,32 +306,24 @@ class GeminiService:
     
     def _get_mime_type(self, filename: str) -> str:
         """Determine mime type from filename"""
-        lower = filename.lower()
-        if lower.endswith('.pdf'):
-            return 'application/pdf'
-        elif lower.endswith('.png'):
-            return 'image/png'
-        elif lower.endswith(('.jpg', '.jpeg')):
-            return 'image/jpeg'
-        elif lower.endswith('.gif'):
-            return 'image/gif'
-        elif lower.endswith('.webp'):
-            return 'image/webp'
-        elif lower.endswith('.avif'):
-            return 'image/avif'
-        else:
+        _, dot, ext = filename.rpartition('.')
+        if not dot:
             return 'application/octet-stream'
+        return MIME_TYPES.get(ext.lower(), 'application/octet-stream')
     
     def _wait_for_file_ready(self, file_name: str, timeout: int = 60):
         """Poll until file is processed and ready"""
         start_time = time.time()
-        poll_interval = 2
+        # Small files are usually ready almost at once - start polling fast
+        # and back off so slow ones don't burn API calls
+        poll_interval = GEMINI_FILE_POLL_INITIAL
         
         while (time.time() - start_time) < timeout:
             file_status = self.client.files.get(name=file_name)
             if file_status.state == 'ACTIVE':
                 return
             time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 1.7, GEMINI_FILE_POLL_MAX)
         
         raise TimeoutError(f"File processing timed out after {timeout} seconds")
     
@@ -166,22 +338,42 @@ class GeminiService:
         deleted = 0
         errors = []
         
+        # Cached handles are about to become invalid
+        with self._uploaded_files_lock:
+            self._uploaded_files.clear()
+        
         try:
-            # List all files in storage
-            files = self.client.files.list()
-            
-            for file in files:
+            # List all files in storage (largest page size = fewest list calls)
+            files = self.client.files.list(
+                config=types.ListFilesConfig(page_size=GEMINI_FILE_LIST_PAGE_SIZE)
+            )
+            file_names = [file.name for file in files]
+        except Exception as e:
+            errors.append(f"Failed to list files: {e}")
+            return {
+                "deleted_count": deleted,
+                "errors": errors
+            }
+        
+        # Delete in parallel on a pool of our own - queuing these on
+        # GEMINI_EXECUTOR would eat into concurrent chat() timeouts
+        with ThreadPoolExecutor(
+            max_workers=GEMINI_DELETE_CONCURRENCY, thread_name_prefix="gemini-cleanup"
+        ) as pool:
+            futures = {
+                pool.submit(self.client.files.delete, name=name): name
+                for name in file_names
+            }
+            for future in as_completed(futures):
+                name = futures[future]
                 try:
-                    self.client.files.delete(name=file.name)
-                    print(f"🗑️ Deleted: {file.name}")
+                    future.result()
+                    print(f"🗑️ Deleted: {name}")
                     deleted += 1
                 except Exception as e:
-                    errors.append(f"{file.name}: {e}")
-            
-            print(f"✅ Cleanup complete: {deleted} files deleted")
-            
-        except Exception as e:
-            errors.append(f"Failed to list files: {e}")
+                    errors.append(f"{name}: {e}")
+        
+        print(f"✅ Cleanup complete: {deleted} files deleted")
         
         return {
             "deleted_count": deleted,
@@ -0,0 +1,73 @@
+"""
+Price cache - Redis cache for price lookup results
+"""
+from typing import Any, Dict, Optional
+import orjson
+from config.settings import settings
+from config.constants import PRICE_CACHE_TTL, PRICE_CACHE_NEGATIVE_TTL, PRICE_CACHE_SOCKET_TIMEOUT
+
+
+class PriceCache:
+    """
+    Caches lookup_price results in Redis, keyed by normalized procedure and
+    hospital name. Disabled (every get is a miss) when REDIS_URL is not set,
+    and a Redis outage only costs the lookup it would have saved.
+    """
+
+    _client = None
+
+    @classmethod
+    def _get_client(cls):
+        """Get or create Redis client"""
+        if cls._client is None:
+            import redis  # lazy - only needed when a Redis URL is configured
+
+            cls._client = redis.Redis.from_url(
+                settings.redis_url,
+                socket_timeout=PRICE_CACHE_SOCKET_TIMEOUT,
+                socket_connect_timeout=PRICE_CACHE_SOCKET_TIMEOUT,
+            )
+        return cls._client
+
+    @staticmethod
+    def _key(procedure_name: Optional[str], hospital_name: Optional[str]) -> str:
+        procedure = (procedure_name or "").lower().strip()
+        hospital = (hospital_name or "").lower().strip()
+        return f"price:{procedure}:{hospital}"
+
+    @classmethod
+    def get(cls, procedure_name: Optional[str], hospital_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a cached lookup result, or None on miss (or when disabled)"""
+        if not settings.redis_url:
+            return None
+
+        try:
+            raw = cls._get_client().get(cls._key(procedure_name, hospital_name))
+        except Exception as e:
+            print(f"⚠️ Price cache read failed: {e}")
+            return None
+
+        return orjson.loads(raw) if raw else None
+
+    @classmethod
+    def set(cls, procedure_name: Optional[str], hospital_name: Optional[str], result: Dict[str, Any]) -> None:
+        """
+        Store a lookup result (best effort). Found prices are kept for
+        PRICE_CACHE_TTL, Gemini misses for the shorter PRICE_CACHE_NEGATIVE_TTL;
+        errors are transient and never cached.
+        """
+        if not settings.redis_url:
+            return
+
+        status = result.get("status")
+        if status == "found":
+            ttl = PRICE_CACHE_TTL
+        elif status == "not_found":
+            ttl = PRICE_CACHE_NEGATIVE_TTL
+        else:
+            return
+
+        try:
+            cls._get_client().setex(cls._key(procedure_name, hospital_name), ttl, orjson.dumps(result))
+        except Exception as e:
+            print(f"⚠️ Price cache write failed: {e}")
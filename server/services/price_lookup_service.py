@@ -9,6 +9,31 @@ from sqlalchemy import func
 from database.connection import Database
 from database.models import InternalDatabase, AbhaDatabase
 from services.gemini_service import GeminiService
+from services.price_cache import PriceCache
+
+# Opening ``` / ```json fence (with trailing whitespace) or closing ``` fence
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+# Single-procedure price prompt; only the procedure name varies between calls
+_PROMPT_PREFIX = "Find the current market price for the medical procedure '"
+_PROMPT_SUFFIX = """' in India.
+
+Return ONLY a JSON object with this structure:
+{
+    "price": <estimated price in INR as a number>,
+    "price_range_low": <lower estimate if available, null otherwise>,
+    "price_range_high": <upper estimate if available, null otherwise>,
+    "currency": "INR",
+    "notes": "<any relevant notes about the price>"
+}
+
+If you cannot find a reliable price, return:
+{
+    "price": null,
+    "notes": "Price not found"
+}
+
+Return ONLY the JSON, no explanations."""
 
 
 class PriceLookupService:
@@ -19,8 +44,8 @@ class PriceLookupService:
     3. Gemini AI (web search fallback)
     """
 
-    def __init__(self):
-        self.gemini = GeminiService()
+    def __init__(self, gemini: Optional[GeminiService] = None):
+        self.gemini = gemini or GeminiService.shared()
 
     def lookup_price(
         self, procedure_name: str, hospital_name: Optional[str] = None
@@ -28,6 +53,30 @@ class PriceLookupService:
         """
         Look up price for a procedure using the hierarchy:
         ABHA DB -> Internal DB -> Gemini
+        (results are cached in Redis when REDIS_URL is set)
+        """
+        cached = PriceCache.get(procedure_name, hospital_name)
+        if cached is not None:
+            return cached
+
+        # Steps 1-2: ABHA Database, then Internal Database
+        result = self._lookup_db(procedure_name, hospital_name)
+
+        # Step 3: Fall back to Gemini AI
+        if result is None:
+            result = self._lookup_gemini(procedure_name)
+
+        PriceCache.set(procedure_name, hospital_name, result)
+        return result
+
+    def _lookup_db(
+        self, procedure_name: str, hospital_name: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run the database part of the hierarchy (ABHA DB -> Internal DB)
+
+        Returns:
+            Final result (found, or invalid name) or None when Gemini is needed
         """
         if not procedure_name or procedure_name.upper() in ("N/A", "NONE", ""):
             return {
@@ -37,29 +86,25 @@ class PriceLookupService:
                 "source": None,
             }
 
-        # Step 1: Try ABHA Database
+        # Internal is only queried on an ABHA miss, so a hit costs one query
         abha_result = self._lookup_abha(procedure_name)
         if abha_result.get("price") is not None:
             return abha_result
 
-        # Step 2: Try Internal Database
         internal_result = self._lookup_internal(procedure_name, hospital_name)
         if internal_result.get("price") is not None:
             return internal_result
 
-        # Step 3: Fall back to Gemini AI
-        gemini_result = self._lookup_gemini(procedure_name)
-        return gemini_result
+        return None
 
     def _lookup_abha(self, procedure_name: str) -> Dict[str, Any]:
         """Search ABHA database for procedure price"""
         try:
             with Database.get_session() as db:
                 result = (
-                    db.query(AbhaDatabase)
+                    db.query(AbhaDatabase.package_name, AbhaDatabase.total_package_price)
                     .filter(
-                        func.lower(func.trim(AbhaDatabase.package_name))
-                        == func.lower(procedure_name.strip())
+                        func.lower(func.trim(AbhaDatabase.package_name)) == procedure_name.strip().lower()
                     )
                     .first()
                 )
@@ -95,15 +140,18 @@ class PriceLookupService:
         """Search internal database for procedure price"""
         try:
             with Database.get_session() as db:
-                query = db.query(InternalDatabase).filter(
-                    func.lower(func.trim(InternalDatabase.procedure_name))
-                    == func.lower(procedure_name.strip())
+                query = db.query(
+                    InternalDatabase.procedure_name,
+                    InternalDatabase.hospital_name,
+                    InternalDatabase.price,
+                    InternalDatabase.source,
+                ).filter(
+                    InternalDatabase.procedure_name_norm == procedure_name.strip().lower()
                 )
 
                 if hospital_name:
                     query = query.filter(
-                        func.lower(func.trim(InternalDatabase.hospital_name))
-                        == func.lower(hospital_name.strip())
+                        InternalDatabase.hospital_name_norm == hospital_name.strip().lower()
                     )
 
                 result = query.order_by(InternalDatabase.id.desc()).first()
@@ -115,7 +163,7 @@ class PriceLookupService:
                         "price": float(result.price),
                         "source": result.source or "Internal",
                         "procedure_name": result.procedure_name,
-                        "hospital_name": result.hospital_name,
+                        "hospital_name": result.hospital_name or None,  # stored as '' when absent
                     }
 
             return {
@@ -134,64 +182,61 @@ class PriceLookupService:
                 "source": None,
             }
 
-    def _lookup_gemini(self, procedure_name: str) -> Dict[str, Any]:
-        """Use Gemini AI to search for procedure price"""
-        prompt = f"""Find the current market price for the medical procedure '{procedure_name}' in India.
+    def _gemini_prompt(self, procedure_name: str) -> str:
+        """Build the Gemini price search prompt for a procedure"""
+        return _PROMPT_PREFIX + procedure_name + _PROMPT_SUFFIX
 
-Return ONLY a JSON object with this structure:
-{{
-    "price": <estimated price in INR as a number>,
-    "price_range_low": <lower estimate if available, null otherwise>,
-    "price_range_high": <upper estimate if available, null otherwise>,
-    "currency": "INR",
-    "notes": "<any relevant notes about the price>"
-}}
-
-If you cannot find a reliable price, return:
-{{
-    "price": null,
-    "notes": "Price not found"
-}}
+    @staticmethod
+    def _strip_fences(response: str) -> str:
+        """Remove markdown code block markers around a JSON response"""
+        return _JSON_FENCE.sub("", response.strip())
 
-Return ONLY the JSON, no explanations."""
-
-        try:
-            response = self.gemini.chat(prompt)
-
-            # Clean and parse response
-            cleaned = re.sub(r"^```json\s*", "", response.strip())
-            cleaned = re.sub(r"^```\s*", "", cleaned)
-            cleaned = re.sub(r"\s*```$", "", cleaned)
-
-            data = json.loads(cleaned)
-
-            if data.get("price"):
-                return {
-                    "status": "found",
-                    "message": "Price found via Gemini AI search",
-                    "price": float(data["price"]),
-                    "price_range_low": data.get("price_range_low"),
-                    "price_range_high": data.get("price_range_high"),
-                    "source": "Gemini",
-                    "notes": data.get("notes"),
-                }
+    def _parse_gemini_response(self, procedure_name: str, response: str) -> Dict[str, Any]:
+        """Turn a Gemini price search response into a lookup result"""
+        data = json.loads(self._strip_fences(response))
+        return self._gemini_result(procedure_name, data)
 
+    @staticmethod
+    def _gemini_result(procedure_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Lookup result for one procedure's parsed Gemini answer"""
+        if data.get("price"):
             return {
-                "status": "not_found",
-                "message": f"Gemini could not find price for '{procedure_name}'",
-                "price": None,
-                "source": None,
+                "status": "found",
+                "message": "Price found via Gemini AI search",
+                "price": float(data["price"]),
+                "price_range_low": data.get("price_range_low"),
+                "price_range_high": data.get("price_range_high"),
+                "source": "Gemini",
                 "notes": data.get("notes"),
             }
 
+        return {
+            "status": "not_found",
+            "message": f"Gemini could not find price for '{procedure_name}'",
+            "price": None,
+            "source": None,
+            "notes": data.get("notes"),
+        }
+
+    def _lookup_gemini(self, procedure_name: str) -> Dict[str, Any]:
+        """Use Gemini AI to search for procedure price"""
+        try:
+            response = self.gemini.chat(self._gemini_prompt(procedure_name))
+            return self._parse_gemini_response(procedure_name, response)
+
         except Exception as e:
             print(f"Gemini lookup error: {e}")
-            return {
-                "status": "error",
-                "message": f"Gemini search error: {type(e).__name__}",
-                "price": None,
-                "source": None,
-            }
+            return self._gemini_error(e)
+
+    @staticmethod
+    def _gemini_error(error: Exception) -> Dict[str, Any]:
+        """Lookup result for a failed Gemini search"""
+        return {
+            "status": "error",
+            "message": f"Gemini search error: {type(error).__name__}",
+            "price": None,
+            "source": None,
+        }
 
     def save_to_internal_db(
         self,
@@ -203,13 +248,12 @@ Return ONLY the JSON, no explanations."""
         """Save a price lookup result to internal database for future use"""
         try:
             with Database.get_session() as db:
-                record = InternalDatabase(
-                    procedure_name=procedure_name,
-                    price=price,
-                    source=source,
-                    hospital_name=hospital_name,
-                )
-                db.add(record)
+                InternalDatabase.bulk_upsert(db, [{
+                    "procedure_name": procedure_name,
+                    "price": price,
+                    "source": source,
+                    "hospital_name": hospital_name,
+                }])
 
             return {"status": "success", "message": "Price saved to internal database"}
 
@@ -4,7 +4,8 @@ Session management service using SQLAlchemy
 import uuid
 from typing import Optional, Dict, Any
 from database.connection import Database
-from database.models import ChatSession, SessionStatus, DocumentChoice
+from database.models import ChatSession
+from models.enums import SessionStatus, DocumentChoice
 
 
 class SessionService:
@@ -13,7 +14,7 @@ class SessionService:
     @staticmethod
     def create_session() -> str:
         """Create a new chat session"""
-        session_id = str(uuid.uuid4())
+        session_id = uuid.uuid4().hex
 
         with Database.get_session() as db:
             chat_session = ChatSession(
@@ -35,7 +36,7 @@ class SessionService:
 
             return {
                 "id": session.id,
-                "status": session.status.value if session.status else None,
+                "status": session.status,
                 "document_choice": session.document_choice.value if session.document_choice else None,
                 "created_at": session.created_at,
                 "updated_at": session.updated_at,
@@ -49,34 +50,39 @@ class SessionService:
             }
 
     @staticmethod
-    def update_status(session_id: str, status: str) -> bool:
-        """Update session status"""
+    def _update(session_id: str, values: Dict[Any, Any]) -> bool:
+        """
+        Update columns of one session with a single UPDATE (the row is never loaded)
+
+        Returns:
+            True if the session exists
+        """
         with Database.get_session() as db:
-            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-            if session:
-                session.status = SessionStatus(status)
-                return True
-            return False
+            updated = (
+                db.query(ChatSession)
+                .filter(ChatSession.id == session_id)
+                .update(values, synchronize_session=False)
+            )
+            return updated > 0
+
+    @staticmethod
+    def update_status(session_id: str, status: SessionStatus) -> bool:
+        """Update session status"""
+        return SessionService._update(session_id, {ChatSession.status: status})
 
     @staticmethod
     def set_document_choice(session_id: str, choice: str) -> bool:
         """Set the document choice"""
-        with Database.get_session() as db:
-            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-            if session:
-                session.document_choice = DocumentChoice(choice)
-                return True
-            return False
+        return SessionService._update(
+            session_id, {ChatSession.document_choice: DocumentChoice(choice)}
+        )
 
     @staticmethod
     def save_extraction(session_id: str, extraction_type: str, data: Dict[str, Any]) -> bool:
         """Save extracted JSON data"""
-        with Database.get_session() as db:
-            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-            if session:
-                setattr(session, extraction_type, data)
-                return True
-            return False
+        return SessionService._update(
+            session_id, {getattr(ChatSession, extraction_type): data}
+        )
 
     @staticmethod
     def get_extraction(session_id: str, extraction_type: str) -> Optional[Dict[str, Any]]:
@@ -1,20 +1,37 @@
 """
 Storage service for file handling using SQLAlchemy
-Currently stores as blob in DB, interface ready for S3 swap
+Stores files in S3 when a bucket is configured, otherwise as blob in DB
 """
 from typing import Optional, Tuple
+from config.settings import settings
 from database.connection import Database
 from database.models import ChatSession
 
 
 class StorageService:
     """
-    File storage service - blob storage now, S3-ready interface
-    Just swap the internal implementation later without changing callers
+    File storage service - S3 objects, with DB blob fallback
+    The session row only keeps the S3 key and filename; callers don't
+    need to know which backend holds the bytes
     """
 
+    _s3 = None
+
+    @classmethod
+    def _get_s3(cls):
+        """Get or create S3 client"""
+        if cls._s3 is None:
+            import boto3  # lazy - only needed when S3 storage is configured
+
+            cls._s3 = boto3.client("s3", region_name=settings.aws_region)
+        return cls._s3
+
     @staticmethod
-    def store_file(session_id: str, file_type: str, file_data: bytes, filename: str) -> bool:
+    def _s3_key(session_id: str, file_type: str) -> str:
+        return f"sessions/{session_id}/{file_type}"
+
+    @classmethod
+    def store_file(cls, session_id: str, file_type: str, file_data: bytes, filename: str) -> bool:
         """
         Store file for a session
 
@@ -27,19 +44,29 @@ class StorageService:
         Returns:
             True if successful
         """
-        file_column = f"{file_type}_file"
-        name_column = f"{file_type}_filename"
+        # Upload before opening the DB session so no connection is held during it
+        s3_key = None
+        if settings.s3_bucket:
+            s3_key = cls._s3_key(session_id, file_type)
+            cls._get_s3().put_object(Bucket=settings.s3_bucket, Key=s3_key, Body=file_data)
+
+        values = {getattr(ChatSession, f"{file_type}_filename"): filename}
+        if s3_key:
+            values[getattr(ChatSession, f"{file_type}_s3_key")] = s3_key
+        else:
+            values[getattr(ChatSession, f"{file_type}_file")] = file_data
 
+        # Single UPDATE - the session row is never loaded
         with Database.get_session() as db:
-            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-            if session:
-                setattr(session, file_column, file_data)
-                setattr(session, name_column, filename)
-                return True
-            return False
+            updated = (
+                db.query(ChatSession)
+                .filter(ChatSession.id == session_id)
+                .update(values, synchronize_session=False)
+            )
+            return updated > 0
 
-    @staticmethod
-    def get_file(session_id: str, file_type: str) -> Optional[Tuple[bytes, str]]:
+    @classmethod
+    def get_file(cls, session_id: str, file_type: str) -> Optional[Tuple[bytes, str]]:
         """
         Retrieve file for a session
 
@@ -50,14 +77,20 @@ class StorageService:
         Returns:
             Tuple of (file_bytes, filename) or None
         """
-        file_column = f"{file_type}_file"
-        name_column = f"{file_type}_filename"
-
         with Database.get_session() as db:
             session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-            if session:
-                file_data = getattr(session, file_column, None)
-                filename = getattr(session, name_column, None)
-                if file_data and filename:
-                    return (file_data, filename)
-            return None
+            if not session:
+                return None
+
+            filename = getattr(session, f"{file_type}_filename", None)
+            s3_key = getattr(session, f"{file_type}_s3_key", None)
+            # Deferred column - only loaded here, and only when not in S3
+            file_data = None if s3_key else getattr(session, f"{file_type}_file", None)
+
+        if s3_key:
+            response = cls._get_s3().get_object(Bucket=settings.s3_bucket, Key=s3_key)
+            file_data = response["Body"].read()
+
+        if file_data and filename:
+            return (file_data, filename)
+        return None
@@ -1,21 +1,27 @@
 """
 Test database connection
 """
-from database.connection import DatabaseConnection
+from sqlalchemy import text
+from database.connection import Database
 
 print("Testing database connection...")
 
 try:
-    with DatabaseConnection.get_cursor() as cursor:
-        cursor.execute("SELECT DATABASE()")
-        db_name = cursor.fetchone()
+    with Database.get_engine().connect() as conn:
+        db_name = conn.execute(text("SELECT DATABASE()")).scalar()
         print(f"✅ Connected to database: {db_name}")
-        
-        cursor.execute("SHOW TABLES")
-        tables = cursor.fetchall()
-        print(f"✅ Found {len(tables)} tables:")
-        for table in tables:
-            print(f"   - {list(table.values())[0]}")
-        
+
+        # Stream plain tuple rows instead of materializing SHOW TABLES dicts
+        result = conn.execute(text(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() ORDER BY table_name"
+        ))
+        count = 0
+        print("✅ Tables:")
+        for (name,) in result:
+            print(f"   - {name}")
+            count += 1
+        print(f"✅ Found {count} tables")
+
 except Exception as e:
     print(f"❌ Error: {e}")
@@ -0,0 +1,40 @@
+"""
+Shared pytest setup - run from the server directory: python -m pytest -q
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Settings require a Gemini key at import time; tests never call Gemini
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.dialects.mysql import LONGBLOB  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+
+@compiles(LONGBLOB, "sqlite")
+def _longblob_as_blob(type_, compiler, **kw):
+    return "BLOB"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Point Database at a fresh in-memory SQLite database"""
+    from database.connection import Database
+    from database.models import Base
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(Database, "_engine", engine)
+    monkeypatch.setattr(Database, "_SessionLocal", None)
+    yield Database
+    engine.dispose()
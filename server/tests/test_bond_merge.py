@@ -0,0 +1,88 @@
+"""
+Bond extraction reuse - merging cached items with a delta query
+"""
+import pytest
+
+from services.extraction_cache import ExtractionCache
+from services.extraction_service import ExtractionService
+
+
+class FakeGemini:
+    model = "test-model"
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = ExtractionService(gemini=FakeGemini())
+    service.cache = ExtractionCache(cache_dir=str(tmp_path))
+    service.asked = []
+
+    def query_bond(file_data, filename, bill_keywords):
+        # One coverage row per asked item, plus a row Gemini wasn't asked about
+        service.asked.append(bill_keywords)
+        return {
+            "sum_insured": 500000,
+            "coverage_limits": [{"bill_item": item.upper()} for item in bill_keywords]
+                               + [{"bill_item": "stray"}],
+            "exclusions": [],
+        }
+
+    service._query_bond = query_bond
+    return service
+
+
+def test_merge_keeps_bond_wide_fields_from_base(service):
+    base = {"sum_insured": 100000, "general_copay_percentage": 10, "coverage_limits": [], "exclusions": []}
+    delta = {"sum_insured": 1, "coverage_limits": [{"bill_item": "X-Ray"}], "exclusions": []}
+
+    merged = service._merge_bond_extractions(base, ["X-Ray"], delta)
+
+    assert merged["sum_insured"] == 100000
+    assert merged["general_copay_percentage"] == 10
+    assert merged["coverage_limits"] == [{"bill_item": "X-Ray"}]
+
+
+def test_merge_filters_base_and_delta_rows_to_bill_items(service):
+    base = {
+        "sum_insured": 100000,
+        "coverage_limits": [{"bill_item": " room "}, {"bill_item": "ICU"}],
+        "exclusions": [{"bill_item": "Cosmetics"}],
+    }
+    delta = {
+        "coverage_limits": [{"bill_item": "X-RAY"}, {"bill_item": "not asked"}],
+        "exclusions": [{"bill_item": "Gloves"}],
+    }
+
+    merged = service._merge_bond_extractions(base, ["Room", "X-Ray", "Gloves"], delta)
+
+    assert merged["coverage_limits"] == [{"bill_item": " room "}, {"bill_item": "X-RAY"}]
+    assert merged["exclusions"] == [{"bill_item": "Gloves"}]
+
+
+def test_merge_without_delta(service):
+    base = {"sum_insured": 1, "coverage_limits": [{"bill_item": "Room"}, {"bill_item": "ICU"}]}
+
+    merged = service._merge_bond_extractions(base, ["ICU"], None)
+
+    assert merged["coverage_limits"] == [{"bill_item": "ICU"}]
+    assert merged["exclusions"] == []
+
+
+def test_similar_bill_only_queries_new_items(service):
+    items = [f"item {n}" for n in range(10)]
+    service.extract_bond_for_keywords(b"bond", "bond.pdf", items)
+
+    result = service.extract_bond_for_keywords(b"bond", "bond.pdf", items + ["new item"])
+
+    assert service.asked[-1] == ["new item"]
+    assert sorted(row["bill_item"] for row in result["coverage_limits"]) == sorted(
+        item.upper() for item in items + ["new item"]
+    )
+
+
+def test_dissimilar_bill_queries_everything(service):
+    service.extract_bond_for_keywords(b"bond", "bond.pdf", ["a", "b", "c", "d"])
+
+    service.extract_bond_for_keywords(b"bond", "bond.pdf", ["a", "b", "x", "y"])
+
+    assert service.asked[-1] == ["a", "b", "x", "y"]
@@ -0,0 +1,34 @@
+"""
+Claim calculation - amount normalisation
+"""
+import pytest
+
+from services.calculation_service import CalculationService, _num
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 0),
+    (0, 0),
+    (1200, 1200),
+    (12.5, 12.5),
+    ("1200", 1200.0),
+    ("1,200", 1200.0),
+    ("₹1,85,000", 185000.0),
+    ("", 0.0),
+])
+def test_num(value, expected):
+    assert _num(value) == expected
+
+
+def test_string_amounts_count_towards_totals():
+    bill = {
+        "total_amount": "1,000",
+        "discount": None,
+        "line_items": [{"item_name": "Room", "amount": "600"}, {"item_name": "X-Ray", "amount": 400}],
+    }
+    bond = {"sum_insured": 100000, "coverage_limits": [], "exclusions": []}
+
+    result = CalculationService().calculate_claim(bill, bond)
+
+    assert result["total_bill_amount"] == 1000
+    assert [item["bill_amount"] for item in result["matched_items"]] == [600, 400]
@@ -0,0 +1,84 @@
+"""
+/api/claim_calc - uploads are validated before any session is created
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from routes import chat as chat_route
+from database.models import ChatSession
+from models.enums import SessionStatus
+
+BILL = {"total_amount": 1000, "discount": 0, "line_items": [{"item_name": "Room", "amount": 600}]}
+BOND = {"sum_insured": 100000, "general_copay_percentage": 0, "coverage_limits": [], "exclusions": []}
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    async def fake_bill(file_data, filename, max_retries=2):
+        return BILL
+
+    async def fake_bond(file_data, filename, bill_keywords):
+        return BOND
+
+    monkeypatch.setattr(chat_route.extraction_service, "aextract_bill", fake_bill)
+    monkeypatch.setattr(chat_route.extraction_service, "aextract_bond_for_keywords", fake_bond)
+    return TestClient(main.app)
+
+
+def _session_count(db) -> int:
+    with db.get_session() as session:
+        return session.query(ChatSession).count()
+
+
+def _post(client, bond=("bond.pdf", b"%PDF bond"), bill=("bill.pdf", b"%PDF bill")):
+    files = [
+        ("bond", (bond[0], bond[1], "application/pdf")),
+        ("bill", (bill[0], bill[1], "application/pdf")),
+    ]
+    return client.post("/api/claim_calc", files=files)
+
+
+def test_claim_calc_completes_session(client, db):
+    response = _post(client)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == SessionStatus.COMPLETED.value
+    assert '"total_bill_amount":1000' in body["reply"]
+
+    with db.get_session() as session:
+        stored = session.get(ChatSession, body["session_id"])
+        assert stored.status is SessionStatus.COMPLETED
+        assert stored.policy_bond_filename == "bond.pdf"
+        assert stored.bill_filename == "bill.pdf"
+
+
+@pytest.mark.parametrize("bond_name, bill_name", [
+    ("bond.exe", "bill.pdf"),
+    ("bond.pdf", "bill.exe"),
+    ("bond.pdf", "bill"),
+])
+def test_claim_calc_rejects_file_type_without_session(client, db, bond_name, bill_name):
+    response = _post(client, bond=(bond_name, b"x"), bill=(bill_name, b"x"))
+
+    assert response.status_code == 400
+    assert _session_count(db) == 0
+
+
+def test_claim_calc_rejects_oversized_bill_without_session(client, db, monkeypatch):
+    monkeypatch.setattr(chat_route, "MAX_FILE_SIZE", 16)
+
+    response = _post(client, bill=("bill.pdf", b"x" * 17))
+
+    assert response.status_code == 400
+    assert _session_count(db) == 0
+
+
+def test_claim_calc_requires_both_files(client, db):
+    response = client.post(
+        "/api/claim_calc", files=[("bond", ("bond.pdf", b"%PDF", "application/pdf"))]
+    )
+
+    assert response.status_code == 422
+    assert _session_count(db) == 0
@@ -0,0 +1,78 @@
+"""
+ExtractionCache - disk round-trip, expiry and group bookkeeping
+"""
+import time
+
+import pytest
+
+from services import extraction_cache
+from services.extraction_cache import ExtractionCache, MAX_GROUP_SIZE
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(cache_dir=str(tmp_path), ttl=60)
+
+
+def _tmp_files(cache):
+    return list(cache.cache_dir.rglob("*.tmp"))
+
+
+def test_round_trip(cache):
+    key = ExtractionCache.make_key(b"bill-v1", b"file bytes")
+    value = {"total_amount": 1000, "line_items": [{"item_name": "Room", "amount": 600}]}
+
+    cache.set(key, value)
+
+    assert cache.get(key) == value
+    assert _tmp_files(cache) == []
+
+
+def test_miss_returns_none(cache):
+    assert cache.get(ExtractionCache.make_key(b"unknown")) is None
+
+
+def test_make_key_keeps_parts_apart():
+    assert ExtractionCache.make_key(b"ab", b"c") != ExtractionCache.make_key(b"a", b"bc")
+
+
+def test_expired_entry_is_evicted(cache, monkeypatch):
+    key = ExtractionCache.make_key(b"bond")
+    cache.set(key, {"sum_insured": 1})
+    now = time.time()
+
+    monkeypatch.setattr(extraction_cache.time, "time", lambda: now + 61)
+
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+
+
+def test_corrupt_entry_is_evicted(cache):
+    key = ExtractionCache.make_key(b"corrupt")
+    cache.cache_dir.mkdir(parents=True, exist_ok=True)
+    cache._path(key).write_text("{not json", encoding="utf-8")
+
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+
+
+def test_failed_write_leaves_no_temp_file(cache):
+    key = ExtractionCache.make_key(b"bad")
+
+    cache.set(key, {"value": object()})
+
+    assert cache.get(key) is None
+    assert _tmp_files(cache) == []
+
+
+def test_group_keeps_newest_members(cache):
+    group_key = ExtractionCache.make_key(b"bond-v1", b"bond bytes")
+
+    for i in range(MAX_GROUP_SIZE + 5):
+        cache.add_to_group(group_key, {"key": str(i)})
+
+    members = cache.get_group(group_key)
+    assert len(members) == MAX_GROUP_SIZE
+    assert members[0] == {"key": "5"}
+    assert members[-1] == {"key": str(MAX_GROUP_SIZE + 4)}
+    assert _tmp_files(cache) == []
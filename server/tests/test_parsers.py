@@ -0,0 +1,86 @@
+"""
+Parser fast paths must give the same results as the straightforward versions
+"""
+import copy
+import io
+import re
+
+import pytest
+
+from utils.parsers import _find_csv_header, clean_numeric_values, parse_currency_to_float
+
+
+def reference_clean_numeric_values(df_list):
+    """Original implementation: first number found anywhere in the value"""
+    cleaned_df = []
+    for row in df_list:
+        value = str(row.get('value', ''))
+        numeric_part = re.findall(r"\d+(?:\.\d+)?", value.replace(',', ''))
+        if numeric_part:
+            row['value'] = numeric_part[0]
+        cleaned_df.append(row)
+    return cleaned_df
+
+
+def reference_find_csv_header(csv_data):
+    """Original implementation: first line that starts with a header name, as an offset"""
+    offset = 0
+    for line in io.StringIO(csv_data).readlines():
+        if line.strip().startswith("Extraction_ID") or line.strip().startswith("Field"):
+            return offset
+        offset += len(line)
+    return -1
+
+
+NUMERIC_VALUES = [
+    "1200", "1,200", "1,85,000", "12.50", "₹10,000", "Rs. 500/-", "20 %", "20%",
+    "N/A", "", "  ", "abc", "1.2.3", "3.", ".5", "10 days @ 500", "٣٠", "1e3",
+    "-15", "+7", "0", "007", None, 1200, 12.5,
+]
+
+CSV_RESPONSES = [
+    "Field,Value\nRoom,100\n",
+    "Here is the data:\nField,Value\nRoom,100",
+    "```csv\nExtraction_ID,Field,Value\n1,Room,100\n```",
+    "  Field,Value\nRoom,100",
+    "\r Field,x\n1,2",
+    "\x0c Extraction_ID,a\nb",
+    "Notes: Field names below\nField,Value\n",
+    "Fieldy,Value\nx,1",
+    "Value,Field\n1,2",
+    "no header here\n1,2",
+    "",
+    "line one\r\nField,Value\r\nRoom,100\r\n",
+    "Extraction_ID later\nField,Value",
+]
+
+
+@pytest.mark.parametrize("value", NUMERIC_VALUES)
+def test_clean_numeric_values_matches_reference(value):
+    rows = [{"keyword": "k", "value": value}]
+
+    assert clean_numeric_values(copy.deepcopy(rows)) == reference_clean_numeric_values(copy.deepcopy(rows))
+
+
+def test_clean_numeric_values_row_without_value():
+    rows = [{"keyword": "k"}]
+
+    assert clean_numeric_values(copy.deepcopy(rows)) == reference_clean_numeric_values(copy.deepcopy(rows))
+
+
+@pytest.mark.parametrize("csv_data", CSV_RESPONSES)
+def test_find_csv_header_matches_reference(csv_data):
+    assert _find_csv_header(csv_data) == reference_find_csv_header(csv_data)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1,85,000", 185000.0),
+    ("₹10,000", 10000.0),
+    (1200, 1200.0),
+    (12.5, 12.5),
+    ("", 0.0),
+    (None, 0.0),
+    ("abc", 0.0),
+])
+def test_parse_currency_to_float(value, expected):
+    assert parse_currency_to_float(value) == expected
@@ -8,7 +8,12 @@ from .parsers import (
     clean_numeric_values,
     clean_ncb_value,
 )
-from .fuzzy_match import find_nearest_keyword_in_df, find_nearest_field_in_extracted
+from .fuzzy_match import (
+    FuzzyIndex,
+    build_fuzzy_index,
+    find_nearest_keyword_in_df,
+    find_nearest_field_in_extracted,
+)
 from .formatters import format_extracted_data_for_display, format_df_list_for_display
 
 __all__ = [
@@ -17,6 +22,8 @@ __all__ = [
     "create_dataframe_list",
     "clean_numeric_values",
     "clean_ncb_value",
+    "FuzzyIndex",
+    "build_fuzzy_index",
     "find_nearest_keyword_in_df",
     "find_nearest_field_in_extracted",
     "format_extracted_data_for_display",
@@ -1,17 +1,67 @@
 """
 Fuzzy matching utilities
 """
-import difflib
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+from rapidfuzz import fuzz, process
 from config.constants import FUZZY_MATCH_CUTOFF
 
 
-def find_nearest_keyword_in_df(df_list: List[Dict[str, str]], target_keyword: str, cutoff: float = FUZZY_MATCH_CUTOFF) -> Optional[str]:
+class FuzzyIndex:
+    """
+    Normalized names of a row list, built once and reused across lookups
+
+    Callers matching many targets against the same rows should build the
+    index with build_fuzzy_index() and pass it in place of the list.
+    """
+
+    __slots__ = ("normalized_to_original", "choices")
+
+    def __init__(self, normalized_to_original: Dict[str, str]):
+        self.normalized_to_original = normalized_to_original
+        self.choices = tuple(normalized_to_original)
+
+    def find(self, target: str, cutoff: float = FUZZY_MATCH_CUTOFF) -> Optional[str]:
+        """Return the original name closest to target, or None below cutoff"""
+        if not self.choices:
+            return None
+
+        match = process.extractOne(
+            target.strip().lower(),
+            self.choices,
+            scorer=fuzz.ratio,
+            score_cutoff=cutoff * 100
+        )
+
+        if match:
+            return self.normalized_to_original[match[0]]
+        return None
+
+
+def build_fuzzy_index(rows: List[Dict[str, str]], key: str = 'keyword') -> FuzzyIndex:
+    """
+    Build a reusable fuzzy index over one column of a row list
+    
+    Args:
+        rows: List of dicts
+        key: Column holding the names to match ('keyword' or 'Field')
+    
+    Returns:
+        FuzzyIndex of the non-empty names
+    """
+    # Single pass: normalized name -> original
+    return FuzzyIndex({
+        name.lower(): name
+        for row in rows
+        if (name := (row.get(key) or '').strip())
+    })
+
+
+def find_nearest_keyword_in_df(df_list: Union[List[Dict[str, str]], FuzzyIndex], target_keyword: str, cutoff: float = FUZZY_MATCH_CUTOFF) -> Optional[str]:
     """
     Find nearest matching keyword in dataframe list
     
     Args:
-        df_list: List of dicts with 'keyword' key
+        df_list: List of dicts with 'keyword' key, or a FuzzyIndex built from one
         target_keyword: Keyword to search for
         cutoff: Similarity threshold (0.0 to 1.0)
     
@@ -21,29 +71,16 @@ def find_nearest_keyword_in_df(df_list: List[Dict[str, str]], target_keyword: st
     if not df_list:
         return None
     
-    keywords = [row.get('keyword', '').strip() for row in df_list if row.get('keyword')]
-    if not keywords:
-        return None
-    
-    normalized_to_original = {k.lower(): k for k in keywords}
-    matches = difflib.get_close_matches(
-        target_keyword.strip().lower(),
-        list(normalized_to_original.keys()),
-        n=1,
-        cutoff=cutoff
-    )
-    
-    if matches:
-        return normalized_to_original.get(matches[0])
-    return None
+    index = df_list if isinstance(df_list, FuzzyIndex) else build_fuzzy_index(df_list, 'keyword')
+    return index.find(target_keyword, cutoff)
 
 
-def find_nearest_field_in_extracted(extracted_rows: List[Dict[str, str]], target_field: str, cutoff: float = FUZZY_MATCH_CUTOFF) -> Optional[str]:
+def find_nearest_field_in_extracted(extracted_rows: Union[List[Dict[str, str]], FuzzyIndex], target_field: str, cutoff: float = FUZZY_MATCH_CUTOFF) -> Optional[str]:
     """
     Find nearest matching field in extracted data
     
     Args:
-        extracted_rows: List of extracted data dicts
+        extracted_rows: List of extracted data dicts, or a FuzzyIndex built from one
         target_field: Field name to search for
         cutoff: Similarity threshold
     
@@ -53,18 +90,5 @@ def find_nearest_field_in_extracted(extracted_rows: List[Dict[str, str]], target
     if not extracted_rows:
         return None
     
-    fields = [row.get('Field', '').strip() for row in extracted_rows if row.get('Field')]
-    if not fields:
-        return None
-    
-    normalized_to_original = {f.lower(): f for f in fields}
-    matches = difflib.get_close_matches(
-        target_field.strip().lower(),
-        list(normalized_to_original.keys()),
-        n=1,
-        cutoff=cutoff
-    )
-    
-    if matches:
-        return normalized_to_original[matches[0]]
-    return None
+    index = extracted_rows if isinstance(extracted_rows, FuzzyIndex) else build_fuzzy_index(extracted_rows, 'Field')
+    return index.find(target_field, cutoff)
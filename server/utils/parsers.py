@@ -3,8 +3,20 @@ Data parsing utilities
 """
 import csv
 import io
+import logging
 import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at import; these run per extracted row
+_NUM_RE = re.compile(r"\d+(?:\.\d+)?")
+_NUM_PCT_RE = re.compile(r"\d+\s*%")
+# Placeholders the model writes for a field it could not find
+_MISSING_VALUES = frozenset(('N/A', 'NOT FOUND', 'NONE'))
+# A CSV header line starts (after optional whitespace) with one of these
+_CSV_HEADER_NAMES = ("Extraction_ID", "Field")
 
 
 def parse_currency_to_float(currency_str: str) -> float:
@@ -17,15 +29,63 @@ def parse_currency_to_float(currency_str: str) -> float:
     Returns:
         Float value or 0.0 if parsing fails
     """
-    if not currency_str or str(currency_str).upper() in ('N/A', 'NOT FOUND', 'NONE', 'NIL'):
+    if not currency_str:
+        return 0.0
+    
+    text = currency_str
+    if type(text) is not str:
+        # JSON numbers need no cleanup (bool is excluded - str(True) never parsed)
+        if type(text) is int or type(text) is float:
+            return float(text)
+        text = str(text)
+    
+    value = _parse_currency_text(text)
+    if value is None:
+        logger.warning("Failed to parse %r to float. Defaulting to 0.0.", text)
+        return 0.0
+    return value
+
+
+@lru_cache(maxsize=4096)
+def _parse_currency_text(text: str) -> Optional[float]:
+    """
+    Parse one currency string, memoized since bills repeat the same amounts
+    
+    Returns:
+        Float value, 0.0 for placeholders, or None if parsing fails
+    """
+    # Placeholders are at most 9 characters; skip upper() for longer text
+    if len(text) <= 9 and text.upper() in ('N/A', 'NOT FOUND', 'NONE', 'NIL'):
         return 0.0
     
     try:
-        clean_str = str(currency_str).replace('"', '').replace(',', '').replace('₹', '').replace('INR', '').replace('$', '').replace('%', '').strip()
+        clean_str = text.replace('"', '').replace(',', '').replace('₹', '').replace('INR', '').replace('$', '').replace('%', '').strip()
         return float(clean_str)
     except (ValueError, TypeError):
-        print(f"Warning: Failed to parse '{currency_str}' to float. Defaulting to 0.0.")
-        return 0.0
+        return None
+
+
+def _find_csv_header(csv_data: str) -> int:
+    """
+    Find where the CSV header line starts in an AI response
+    
+    Args:
+        csv_data: Raw CSV string from AI
+    
+    Returns:
+        Offset of the start of the header line, or -1 if there is none
+    """
+    starts = []
+    for name in _CSV_HEADER_NAMES:
+        # str.find scans in C; only candidate hits are checked in Python
+        i = csv_data.find(name)
+        while i != -1:
+            line_start = csv_data.rfind('\n', 0, i) + 1
+            if line_start == i or csv_data[line_start:i].isspace():
+                starts.append(line_start)
+                break
+            i = csv_data.find(name, i + 1)
+    return min(starts, default=-1)
 
 
 def parse_csv_output(csv_data: str) -> List[Dict[str, str]]:
@@ -39,27 +99,17 @@ def parse_csv_output(csv_data: str) -> List[Dict[str, str]]:
         List of dictionaries with extracted data
     """
     try:
-        csv_file = io.StringIO(csv_data)
-        lines = csv_file.readlines()
-        
-        # Find header line
-        header_index = -1
-        for i, line in enumerate(lines):
-            if line.strip().startswith("Extraction_ID") or line.strip().startswith("Field"):
-                header_index = i
-                break
+        header_start = _find_csv_header(csv_data or "")
         
-        if header_index == -1:
-            print("Warning: Could not find expected CSV header in response.")
+        if header_start == -1:
+            logger.warning("Could not find expected CSV header in response.")
             return []
         
-        clean_csv_string = "".join(lines[header_index:])
-        clean_csv_file = io.StringIO(clean_csv_string)
-        reader = csv.DictReader(clean_csv_file)
+        reader = csv.DictReader(io.StringIO(csv_data[header_start:]))
         
         return list(reader)
     except Exception as e:
-        print(f"CSV Parsing Error: {e}")
+        logger.error("CSV Parsing Error: %s", e)
         return []
 
 
@@ -75,21 +125,16 @@ def create_dataframe_list(extracted_data: List[Dict[str, str]]) -> List[Dict[str
     """
     df_list = []
     for row in extracted_data:
-        field = row.get('Field', '').strip()
         value = row.get('Value', '').strip().replace('"', '')
         units = row.get('Units', '').strip()
+        units_upper = units.upper()
         
-        if value.upper() in ('N/A', 'NOT FOUND', 'NONE') and units.upper() in ('N/A', 'NOT FOUND', 'NONE'):
+        if units_upper in _MISSING_VALUES and value.upper() in _MISSING_VALUES:
             continue
         
-        if units and units.upper() != 'N/A':
-            formatted_value = f"{value} {units}"
-        else:
-            formatted_value = value
-        
         df_list.append({
-            'keyword': field,
-            'value': formatted_value
+            'keyword': row.get('Field', '').strip(),
+            'value': f"{value} {units}" if units and units_upper != 'N/A' else value,
         })
     return df_list
 
@@ -106,10 +151,16 @@ def clean_numeric_values(df_list: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
     cleaned_df = []
     for row in df_list:
-        value = str(row.get('value', ''))
-        numeric_part = re.findall(r"\d+(?:\.\d+)?", value.replace(',', ''))
-        if numeric_part:
-            row['value'] = numeric_part[0]
+        value = str(row.get('value', '')).replace(',', '')
+        whole, dot, fraction = value.partition('.')
+        if whole.isdecimal() and (not dot or fraction.isdecimal()):
+            # Already a plain number - the regex would return it unchanged
+            row['value'] = value
+        else:
+            # First number only - search stops there instead of listing all
+            match = _NUM_RE.search(value)
+            if match:
+                row['value'] = match.group(0)
         cleaned_df.append(row)
     return cleaned_df
 
@@ -126,15 +177,16 @@ def clean_ncb_value(value: str) -> str:
     """
     value = str(value).strip()
     
-    # If has number and %, extract "number%"
-    if re.search(r'\d+', value) and '%' in value:
-        match = re.search(r'\d+\s*%', value)
+    # Each pattern needs a digit, so a miss covers "no number" as well
+    # If has %, extract "number%"
+    if '%' in value:
+        match = _NUM_PCT_RE.search(value)
         if match:
             return match.group(0).replace(" ", "")
     
-    # If has number but no %, extract just the number
-    elif re.search(r'\d+', value) and '%' not in value:
-        match = re.search(r'\d+(?:\.\d+)?', value)
+    # If has no %, extract just the number
+    else:
+        match = _NUM_RE.search(value)
         if match:
             return match.group(0)
     
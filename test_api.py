@@ -2,11 +2,13 @@
 API Testing Script - Tests all bill + bond combinations
 """
 import os
-import json
+import orjson
 import requests
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
@@ -15,15 +17,126 @@ BILLS_DIR = DATA_DIR / "Bills"
 BONDS_DIR = DATA_DIR / "realtimebond"
 OUTPUT_DIR = Path("testing")
 
+# Upload mime type by bill file extension
+MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif'
+}
+
 # Testing Configuration
 TEST_PERCENTAGE = 5  # Set percentage of combinations to test (1-100)
                       # 100 = test all combinations
                       # 10 = test 10% of combinations randomly
                       # 1 = test 1% of combinations randomly
+USE_CLAIM_CALC = True  # Send bond + bill in one /api/claim_calc request (falls
+                      # back to the 3-step /api/chat flow if the server lacks it)
+TEST_WORKERS = 4  # Combinations run concurrently (each is a chain of blocking
+                  # HTTP calls); 1 = sequential, with readable per-step logs
 
 # Create output directory
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# One keep-alive connection pool for every call (shared by the worker threads)
+SESSION = requests.Session()
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=TEST_WORKERS))
+
+
+def list_files(directory: Path, suffix: Optional[str] = None) -> List[Path]:
+    """
+    Sorted regular files in a directory, optionally only those with a suffix
+    
+    os.scandir reports the file type from the directory listing itself,
+    so no extra stat call is made per entry
+    """
+    with os.scandir(directory) as entries:
+        files = [Path(entry.path) for entry in entries if entry.is_file()]
+    return sorted(f for f in files if suffix is None or f.suffix.lower() == suffix)
+
+
+@lru_cache(maxsize=None)
+def read_bond(bond_path: Path) -> bytes:
+    """Read a bond PDF once; every bill tested against it reuses the bytes"""
+    return bond_path.read_bytes()
+
+
+def upload_combined(bill_path: Path, bond_path: Path, mime_type: str) -> Tuple[str, Optional[requests.Response]]:
+    """
+    Send bond and bill in one /api/claim_calc request
+    
+    Returns (step name, response), or (step name, None) if the server has no
+    such endpoint - later combinations then go straight to the chat flow
+    """
+    global USE_CLAIM_CALC
+    
+    print("📤 Uploading policy bond + bill...")
+    with open(bill_path, 'rb') as f:
+        response = SESSION.post(
+            f"{API_BASE_URL}/api/claim_calc",
+            files={
+                'bond': (bond_path.name, read_bond(bond_path), 'application/pdf'),
+                'bill': (bill_path.name, f, mime_type),
+            }
+        )
+    
+    if response.status_code == 404:
+        print("⚠️ /api/claim_calc not available, using the chat flow")
+        USE_CLAIM_CALC = False
+        return "Claim calculation", None
+    return "Claim calculation", response
+
+
+def upload_step_by_step(bill_path: Path, bond_path: Path, mime_type: str) -> Tuple[str, requests.Response]:
+    """
+    Walk the /api/chat flow: upload bond, choose "bill", upload bill
+    
+    Returns (step name, response) of the last step run - the first one that
+    failed, or the bill upload carrying the calculation
+    """
+    # Step 1: Create session and upload bond
+    print("📄 Uploading policy bond...")
+    response = SESSION.post(
+        f"{API_BASE_URL}/api/chat",
+        files={'file': (bond_path.name, read_bond(bond_path), 'application/pdf')},
+        data={'user_input': ''}
+    )
+    
+    if response.status_code != 200:
+        return "Bond upload", response
+    
+    session_id = response.json().get('session_id')
+    print(f"✅ Session created: {session_id}")
+    
+    # Step 2: Choose "bill" option
+    print("📋 Selecting bill option...")
+    response = SESSION.post(
+        f"{API_BASE_URL}/api/chat",
+        data={
+            'session_id': session_id,
+            'user_input': 'bill'
+        }
+    )
+    
+    if response.status_code != 200:
+        return "Bill option", response
+    
+    # Step 3: Upload bill
+    print("🧾 Uploading bill...")
+    with open(bill_path, 'rb') as f:
+        response = SESSION.post(
+            f"{API_BASE_URL}/api/chat",
+            files={'file': (bill_path.name, f, mime_type)},
+            data={
+                'session_id': session_id,
+                'user_input': ''
+            }
+        )
+    
+    return "Bill upload", response
+
 
 def test_bill_with_bond(bill_path: Path, bond_path: Path) -> Dict[str, Any]:
     """
@@ -36,63 +149,19 @@ def test_bill_with_bond(bill_path: Path, bond_path: Path) -> Dict[str, Any]:
     print(f"{'='*80}")
     
     try:
-        # Step 1: Create session and upload bond
-        print("📄 Uploading policy bond...")
-        with open(bond_path, 'rb') as f:
-            response = requests.post(
-                f"{API_BASE_URL}/api/chat",
-                files={'file': (bond_path.name, f, 'application/pdf')},
-                data={'user_input': ''}
-            )
-        
-        if response.status_code != 200:
-            return {"error": f"Bond upload failed: {response.status_code}", "response": response.text}
+        mime_type = MIME_TYPES.get(bill_path.suffix.lower(), 'application/octet-stream')
         
-        result = response.json()
-        session_id = result.get('session_id')
-        print(f"✅ Session created: {session_id}")
-        
-        # Step 2: Choose "bill" option
-        print("📋 Selecting bill option...")
-        response = requests.post(
-            f"{API_BASE_URL}/api/chat",
-            data={
-                'session_id': session_id,
-                'user_input': 'bill'
-            }
-        )
-        
-        if response.status_code != 200:
-            return {"error": f"Bill option failed: {response.status_code}", "response": response.text}
-        
-        # Step 3: Upload bill
-        print("🧾 Uploading bill...")
-        with open(bill_path, 'rb') as f:
-            # Determine mime type
-            ext = bill_path.suffix.lower()
-            mime_types = {
-                '.pdf': 'application/pdf',
-                '.png': 'image/png',
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.webp': 'image/webp',
-                '.avif': 'image/avif'
-            }
-            mime_type = mime_types.get(ext, 'application/octet-stream')
-            
-            response = requests.post(
-                f"{API_BASE_URL}/api/chat",
-                files={'file': (bill_path.name, f, mime_type)},
-                data={
-                    'session_id': session_id,
-                    'user_input': ''
-                }
-            )
+        step, response = None, None
+        if USE_CLAIM_CALC:
+            step, response = upload_combined(bill_path, bond_path, mime_type)
+        if response is None:
+            step, response = upload_step_by_step(bill_path, bond_path, mime_type)
         
         if response.status_code != 200:
-            return {"error": f"Bill upload failed: {response.status_code}", "response": response.text}
+            return {"error": f"{step} failed: {response.status_code}", "response": response.text}
         
         result = response.json()
+        session_id = result.get('session_id')
         print("✅ Calculation complete!")
         
         # Extract the calculation result from the reply
@@ -100,7 +169,7 @@ def test_bill_with_bond(bill_path: Path, bond_path: Path) -> Dict[str, Any]:
         if 'Claim Calculation Result:' in reply:
             # Parse the JSON from the reply
             json_str = reply.split('Claim Calculation Result:')[1].strip()
-            calculation = json.loads(json_str)
+            calculation = orjson.loads(json_str)
             return {
                 "success": True,
                 "session_id": session_id,
@@ -127,12 +196,44 @@ def test_bill_with_bond(bill_path: Path, bond_path: Path) -> Dict[str, Any]:
         }
 
 
+def run_combination(bond_path: Path, bill_path: Path) -> Dict[str, Any]:
+    """
+    Test one bond + bill combination and save its result file
+    
+    Returns the test result
+    """
+    result = test_bill_with_bond(bill_path, bond_path)
+    
+    # Save individual result
+    bond_name = bond_path.stem.replace(' ', '_')
+    bill_name = bill_path.stem.replace(' ', '_')
+    output_file = OUTPUT_DIR / f"{bond_name}_{bill_name}.json"
+    
+    # Serialize in one call and write the bytes in a single write
+    output_file.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    
+    print(f"💾 Saved to: {output_file}")
+    
+    # Show summary
+    if result.get('success'):
+        calc = result.get('calculation', {})
+        insurer = calc.get('insurer_pays', 0)
+        patient = calc.get('patient_pays', 0)
+        total_bill = calc.get('total_bill_amount', 0)
+        print(f"✅ SUCCESS - Bill: Rs.{total_bill:.2f} | Insurer: Rs.{insurer:.2f} | Patient: Rs.{patient:.2f}")
+    else:
+        error = result.get('error', 'Unknown error')
+        print(f"❌ FAILED - {error}")
+    
+    return result
+
+
 def main():
     """Run all bill + bond combinations"""
     
     # Get all bills and bonds
-    bills = sorted([f for f in BILLS_DIR.iterdir() if f.is_file()])
-    bonds = sorted([f for f in BONDS_DIR.iterdir() if f.is_file() and f.suffix.lower() == '.pdf'])
+    bills = list_files(BILLS_DIR)
+    bonds = list_files(BONDS_DIR, suffix='.pdf')
     
     # Generate all combinations
     all_combinations = [(bond, bill) for bond in bonds for bill in bills]
@@ -155,36 +256,19 @@ def main():
     print(f"Combinations to test: {num_to_test}")
     print(f"\nStarting tests...\n")
     
-    # Test selected combinations
-    results = []
+    # Test selected combinations concurrently; results keep the sampled order
+    results = [None] * len(combinations_to_test)
     
-    for idx, (bond_path, bill_path) in enumerate(combinations_to_test, 1):
-        print(f"\n[{idx}/{num_to_test}] Testing combination...")
-        
-        # Run test
-        result = test_bill_with_bond(bill_path, bond_path)
-        results.append(result)
-        
-        # Save individual result
-        bond_name = bond_path.stem.replace(' ', '_')
-        bill_name = bill_path.stem.replace(' ', '_')
-        output_file = OUTPUT_DIR / f"{bond_name}_{bill_name}.json"
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
-        
-        print(f"💾 Saved to: {output_file}")
-        
-        # Show summary
-        if result.get('success'):
-            calc = result.get('calculation', {})
-            insurer = calc.get('insurer_pays', 0)
-            patient = calc.get('patient_pays', 0)
-            total_bill = calc.get('total_bill_amount', 0)
-            print(f"✅ SUCCESS - Bill: Rs.{total_bill:.2f} | Insurer: Rs.{insurer:.2f} | Patient: Rs.{patient:.2f}")
-        else:
-            error = result.get('error', 'Unknown error')
-            print(f"❌ FAILED - {error}")
+    with ThreadPoolExecutor(max_workers=TEST_WORKERS) as executor:
+        futures = {
+            executor.submit(run_combination, bond_path, bill_path): idx
+            for idx, (bond_path, bill_path) in enumerate(combinations_to_test)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            idx = futures[future]
+            results[idx] = future.result()
+            bond_path, bill_path = combinations_to_test[idx]
+            print(f"\n[{done}/{num_to_test}] Finished: {bond_path.name} + {bill_path.name}")
     
     # Save summary
     summary = {
@@ -197,8 +281,7 @@ def main():
     }
     
     summary_file = OUTPUT_DIR / "summary.json"
-    with open(summary_file, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    summary_file.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
     
     print(f"\n{'='*80}")
     print(f"TESTING COMPLETE")
@@ -216,7 +299,7 @@ def main():
 if __name__ == "__main__":
     # Check if server is running
     try:
-        response = requests.get(f"{API_BASE_URL}/api/health", timeout=5)
+        response = SESSION.get(f"{API_BASE_URL}/api/health", timeout=5)
         if response.status_code == 200:
             print("✅ Server is running")
         else: